@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+"""
+SIMBA Batch simulation core
+
+The `BatchSimulation` advances several simulation instances (i.e., *lanes*) in lockstep,
+where the state of all lanes (capacitor voltage, load state, timers, converter state, ...) is kept
+as NumPy arrays and updated at once. Each lane still performs exactly the same steps as the regular
+simulation core; only lanes with a load event (i.e., a timer or voltage threshold of the load's state machine)
+call the (scalar) load module to update their state machine. After the run, each lane's modules
+hold the same logs and statistics as after `Simulation.run`, i.e., metrics can be retrieved as usual.
+
+Supported modules: `IdealCapacitor`, `Artificial`, `LDO`, `Hysteresis`, `BuckBoost`, `TaskLoad`, `JITLoad`.
+"""
+
+import numpy as np
+import datetime
+from Simba import VERBOSE, create_experiment, get_experiment_metrics, get_parameter_options, run_experiment, get_result_cache, get_experiment_key, cache_result
+
+NONE = np.iinfo(np.int64).max #marker for 'no update scheduled'
+
+class BatchSimulation:
+
+    capacitors = ['IdealCapacitor']
+    harvesters = ['Artificial']
+    converters = ['LDO', 'Hysteresis', 'BuckBoost']
+    loads = ['TaskLoad', 'JITLoad']
+
+    def __init__(self, sims):
+        assert len(sims) > 0, "Error: Batch simulation needs at least one simulation instance."
+        for sim in sims:
+            assert self.is_supported(sim), "Error: Simulation instance contains modules that are not supported by the batch simulation."
+
+        self.sims = sims
+        self.num = len(sims)
+
+    #check whether the given simulation instance can be simulated in a batch
+    @classmethod
+    def is_supported(cls, sim):
+        return type(sim.cap).__name__ in cls.capacitors and not sim.cap.log_full \
+            and type(sim.harvester).__name__ in cls.harvesters and not sim.harvester.log_full \
+            and type(sim.converter).__name__ in cls.converters \
+            and type(sim.load).__name__ in cls.loads and not sim.load.verbose_log \
+            and sim.log_keys == [] and sim.tolerance == None and sim.stop_conditions == []
+
+    def run(self, until = 10):
+        for sim in self.sims:
+            sim.reset(until)
+            assert until <= sim.harvester.time_max * sim.min_step_size, "Cannot start simulation: Simulation time exceeds harvesting trace."
+        self.reset()
+        self.execute()
+
+    def reset(self):
+        sims = self.sims
+        self.time_base = sims[0].min_step_size
+        assert all(sim.min_step_size == self.time_base for sim in sims), "Error: All lanes must use the same time base."
+
+        self.sim_end = np.array([sim.sim_end for sim in sims], dtype = np.int64)
+        self.max_step = np.array([sim.max_step for sim in sims], dtype = np.int64)
+        self.fast_forward = np.array([sim.fast_forward for sim in sims])
+        self.time = np.zeros(self.num, dtype = np.int64)
+        self.num_steps = np.zeros(self.num, dtype = np.int64)
+
+        # Capacitor
+        self.capacitance = np.array([sim.cap.capacitance for sim in sims], dtype = float)
+        self.v_cap = np.array([sim.cap.voltage for sim in sims], dtype = float)
+        self.energy_leaked = np.array([sim.cap.stats['energy_leaked'] for sim in sims], dtype = float)
+
+        # Harvester
+        harvesters = [sim.harvester for sim in sims]
+        self.harvester_shape = np.array([['const', 'square', 'sine'].index(h.shape) for h in harvesters])
+        self.harvester_v_ov = np.array([h.v_ov for h in harvesters], dtype = float)
+        self.harvester_i_high = np.array([h.i_high for h in harvesters], dtype = float)
+        self.harvester_i_low = np.array([getattr(h, 'i_low', 0) for h in harvesters], dtype = float)
+        self.harvester_t_high = np.array([getattr(h, 't_high_s', 0) for h in harvesters], dtype = np.int64)
+        self.harvester_period = np.array([getattr(h, 'period_s', 1) for h in harvesters], dtype = np.int64)
+        self.energy_harvested = np.array([h.stats['energy_total'] for h in harvesters], dtype = float)
+
+        # Converter
+        converters = [sim.converter for sim in sims]
+        self.converter_type = np.array([self.converters.index(type(c).__name__) for c in converters])
+        self.converter_on = np.array([getattr(c, 'on', True) for c in converters])
+        self.converter_hysteresis = np.array([getattr(c, 'hysteresis', type(c).__name__ == 'Hysteresis') for c in converters])
+        self.converter_v_out = np.array([c.v_out if hasattr(c, 'v_out') else 0 for c in converters], dtype = float)
+        self.converter_v_in = np.array([getattr(c, 'v_in', 0) for c in converters], dtype = float)
+        self.converter_v_ov = np.array([getattr(c, 'v_ov', np.inf) for c in converters], dtype = float)
+        self.converter_v_high = np.array([getattr(c, 'v_high', np.inf) for c in converters], dtype = float)
+        self.converter_v_low = np.array([getattr(c, 'v_low', -np.inf) for c in converters], dtype = float)
+        self.converter_efficiency_in = np.array([getattr(c, 'in_efficiency', 1) for c in converters], dtype = float)
+        self.converter_efficiency_out = np.array([getattr(c, 'out_efficiency', 1) for c in converters], dtype = float)
+        self.converter_i_quiescent = np.array([c.i_quiescent for c in converters], dtype = float)
+        self.converter_i_quiescent_off = np.array([getattr(c, 'i_quiescent_off', c.i_quiescent) for c in converters], dtype = float)
+        self.converter_thresholds = self.get_threshold_table([c.voltage_monitor for c in converters])
+
+        # Voltage limits of the simulation core (only needed when fast-forwarding)
+        self.v_ov = np.array([sim.v_ov for sim in sims], dtype = float)
+        self.sim_thresholds = self.get_threshold_table([sim.voltage_monitor for sim in sims])
+
+        # Load (state machine stays within the load modules, we only keep what is needed between two load events)
+        loads = [sim.load for sim in sims]
+        self.load_trapezoid = np.array([type(l).__name__ == 'JITLoad' for l in loads]) #JITLoad interpolates the voltage for its energy statistics
+        self.load_v_checkpoint = np.array([getattr(l, 'v_checkpoint', -np.inf) for l in loads], dtype = float)
+        self.load_v_off = np.array([l.v_off for l in loads], dtype = float)
+        self.num_states = max(len(l.States) for l in loads)
+        self.load_state = np.zeros(self.num, dtype = np.int64)
+        self.load_compute = np.zeros(self.num, dtype = bool)
+        self.load_current = np.zeros(self.num, dtype = float)
+        self.load_next_update = np.zeros(self.num, dtype = np.int64)
+        self.load_old_voltage = np.zeros(self.num, dtype = float)
+        self.load_time = np.zeros((self.num, self.num_states), dtype = float)
+        self.load_energy = np.zeros((self.num, self.num_states), dtype = float)
+        self.load_thresholds_rising = np.full((self.num, 4), np.nan)
+        self.load_thresholds_falling = np.full((self.num, 4), np.nan)
+        self.load_thresholds_version = np.zeros(self.num, dtype = np.int64)
+
+        # Cached threshold crossings of load/converter (see Simulation.update_crossing): current, thresholds' version, time of crossing, valid until
+        self.crossings = [(np.full(self.num, np.nan), np.zeros(self.num, dtype = np.int64), np.full(self.num, NONE), np.zeros(self.num, dtype = np.int64)) for _ in range(2)]
+        for lane in range(self.num):
+            self.get_load_state(lane)
+
+        for sim in sims:
+            sim.log_data(0, False)
+
+    #store the thresholds of the given voltage monitors as (padded) arrays
+    def get_threshold_table(self, monitors):
+        size = max([len(m.thresholds_rising) for m in monitors] + [len(m.thresholds_falling) for m in monitors] + [1])
+        rising = np.full((len(monitors), size), np.nan)
+        falling = np.full((len(monitors), size), np.nan)
+        for lane, m in enumerate(monitors):
+            rising[lane, :len(m.thresholds_rising)] = list(m.thresholds_rising.keys())
+            falling[lane, :len(m.thresholds_falling)] = list(m.thresholds_falling.keys())
+        return rising, falling
+
+    #copy the state of a single load module into the arrays (after its state machine was updated)
+    def get_load_state(self, lane):
+        load = self.sims[lane].load
+        if type(load).__name__ == 'JITLoad':
+            self.load_current[lane] = load.currents[load.state]
+            self.load_compute[lane] = load.state == load.States.COMPUTE
+        else:
+            self.load_current[lane] = load.i_off if load.state == load.States.OFF else load.tasks[load.current_task]['i']
+
+        self.load_state[lane] = load.state.value - 1
+        self.load_next_update[lane] = NONE if load.next_update[1] == None else load.next_update[1]
+        self.load_old_voltage[lane] = load.old_voltage
+        for state in load.States:
+            self.load_time[lane, state.value - 1] = load.stats[f'time_{state.name}']
+            self.load_energy[lane, state.value - 1] = load.stats[f'energy_{state.name}']
+
+        self.load_thresholds_rising[lane] = np.nan
+        self.load_thresholds_falling[lane] = np.nan
+        self.load_thresholds_rising[lane, :len(load.voltage_monitor.thresholds_rising)] = list(load.voltage_monitor.thresholds_rising.keys())
+        self.load_thresholds_falling[lane, :len(load.voltage_monitor.thresholds_falling)] = list(load.voltage_monitor.thresholds_falling.keys())
+        self.load_thresholds_version[lane] = load.voltage_monitor.version
+
+    #copy the accumulated statistics back to a single load module (before its state machine is updated)
+    def set_load_state(self, lane):
+        load = self.sims[lane].load
+        state = load.state
+        load.stats[f'time_{state.name}'] = float(self.load_time[lane, state.value - 1])
+        load.stats[f'energy_{state.name}'] = float(self.load_energy[lane, state.value - 1])
+        load.old_voltage = float(self.load_old_voltage[lane])
+
+    def execute(self):
+        start = datetime.datetime.now()
+        lanes = np.arange(self.num)
+        active = self.time < self.sim_end
+
+        while active.any():
+
+            # Get incoming power at current point in time, depends on voltage, harvester and converter
+            v_in = self.get_input_operating_voltage(self.v_cap)
+            i_in = self.get_harvester_current(self.time, v_in)
+            efficiency_in = self.get_input_efficiency(v_in)
+
+            # Get outgoing power at current point in time, depends on voltage, converter and load
+            v_out = self.get_output_operating_voltage(self.v_cap)
+            efficiency_out = np.where(self.converter_type == 0, np.where(self.v_cap > self.converter_v_out, self.converter_v_out / np.where(self.v_cap > 0, self.v_cap, 1), 1.0), self.converter_efficiency_out)
+            i_leak_converter = np.where(self.converter_on, self.converter_i_quiescent, self.converter_i_quiescent_off)
+
+            with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                v_in_adjust = np.where(self.v_cap > 0, v_in / self.v_cap, 1)
+                v_out_adjust = np.where(self.v_cap > 0, v_out / self.v_cap, 1)
+            i_total = i_in * v_in_adjust * efficiency_in - self.load_current * v_out_adjust / efficiency_out - i_leak_converter
+
+            # Compute when we have to update our simulation the next time
+            piecewise_constant = self.fast_forward & (v_in < self.v_ov) & (self.harvester_shape != 2) \
+                & ((self.converter_type != 2) | ((self.converter_v_in == 0) & (self.converter_v_out == 0)))
+            dt = np.where(active, self.compute_next_update(i_total, piecewise_constant), 0)
+            next_time = self.time + dt
+
+            # Update capacitor (the voltage changes linearly within the step, account energy at the mean voltage)
+            v_cap = self.v_cap
+            self.v_cap = self.v_cap + (i_total * (dt * self.time_base)) / self.capacitance
+            self.v_cap = np.where(self.v_cap < 0, 0, self.v_cap)
+            self.energy_leaked = self.energy_leaked + i_total * (v_cap + self.v_cap) / 2 * dt * self.time_base
+
+            # Update harvester (voltages change linearly when fast-forwarding, account harvested energy at the mean input voltage)
+            v_in = np.where(piecewise_constant, (v_in + self.get_input_operating_voltage(self.v_cap)) / 2, v_in)
+            self.energy_harvested = self.energy_harvested + self.get_harvester_current(self.time, v_in) * v_in * dt * self.time_base
+
+            # Update converter
+            v_low_crossed = np.where(self.converter_type == 0, self.v_cap < self.converter_v_low, self.v_cap <= self.converter_v_low)
+            v_high_crossed = np.where(self.converter_type == 0, self.v_cap > self.converter_v_high, self.v_cap >= self.converter_v_high)
+            self.converter_on = np.where(self.converter_hysteresis & self.converter_on & v_low_crossed, False,
+                                         np.where(self.converter_hysteresis & ~self.converter_on & v_high_crossed, True, self.converter_on))
+
+            # Update load statistics of the current state
+            v_out = self.get_output_operating_voltage(self.v_cap)
+            self.load_time[lanes, self.load_state] += dt * self.time_base
+            voltage = np.where(self.load_trapezoid, (self.load_old_voltage + v_out) / 2, self.load_old_voltage)
+            self.load_energy[lanes, self.load_state] += voltage * self.load_current * dt * self.time_base
+
+            # Lanes where the load's state machine has to be updated
+            load_event = (self.load_next_update == next_time)
+            voltage_event = self.get_voltage_event(self.load_thresholds_rising, self.load_thresholds_falling, self.load_old_voltage, v_out)
+            checkpoint_event = self.load_compute & (self.load_next_update == NONE) & (self.v_cap <= self.load_v_checkpoint) & (v_out >= self.load_v_off)
+            old_voltage = self.load_old_voltage
+            self.load_old_voltage = v_out
+
+            for lane in np.flatnonzero(active & (load_event | voltage_event | checkpoint_event)):
+                self.update_load(lane, next_time[lane], old_voltage[lane], v_out[lane])
+
+            self.time = next_time
+            self.num_steps += active
+            active = self.time < self.sim_end
+
+        if VERBOSE:
+            print(f"Total elapsed time for batch simulation ({self.num} lanes): {datetime.datetime.now() - start}.")
+
+        # Write back the state of each lane and log last state as well
+        for lane, sim in enumerate(self.sims):
+            self.set_load_state(lane)
+            sim.time = int(self.time[lane])
+            sim.num_steps = int(self.num_steps[lane])
+            sim.cap.voltage = float(self.v_cap[lane])
+            sim.cap.stats['energy_leaked'] = float(self.energy_leaked[lane])
+            sim.harvester.stats['energy_total'] = float(self.energy_harvested[lane])
+            if hasattr(sim.converter, 'on'):
+                sim.converter.on = bool(self.converter_on[lane])
+
+            sim.log_data(sim.time, True)
+            sim.load.process_log(sim.time)
+            sim.cap.process_log(sim.time)
+            sim.harvester.process_log(sim.time)
+
+    #update the state machine of a single load and, if requested by the load, turn off the converter
+    def update_load(self, lane, time, old_voltage, v_out):
+        sim = self.sims[lane]
+
+        # the statistics of the last step are already included, so we let the load account for a zero-length interval
+        self.set_load_state(lane)
+        sim.load.old_voltage = float(old_voltage)
+        if sim.load.update_state(int(time), 0, float(v_out), float(self.v_cap[lane])) == 'FORCE_OFF':
+            if hasattr(sim.converter, 'on'):
+                sim.converter.on = bool(self.converter_on[lane])
+                sim.converter.turn_off(float(self.v_cap[lane]))
+                self.converter_on[lane] = sim.converter.on
+
+        self.get_load_state(lane)
+
+    #compute time until next update is necessary for each lane (see Simulation.compute_next_update)
+    def compute_next_update(self, i, piecewise_constant):
+
+        # Harvester (square wave)
+        t_cycle = self.time % self.harvester_period
+        t_in_update = np.where(t_cycle < self.harvester_t_high, self.harvester_t_high - t_cycle, self.harvester_period - t_cycle)
+        t_in_update = np.where(self.harvester_shape == 1, t_in_update, NONE)
+
+        # Load
+        t_load_update = np.where(self.load_next_update == NONE, NONE, self.load_next_update - self.time)
+
+        # Voltage thresholds of load/converter (and simulation core when fast-forwarding)
+        updates = [t_in_update, t_load_update]
+        tables = [(self.load_thresholds_rising, self.load_thresholds_falling, self.load_thresholds_version), self.converter_thresholds + (0,)]
+        if piecewise_constant.any():
+            tables.append(self.sim_thresholds + (0,))
+        for num, (rising, falling, version) in enumerate(tables):
+            threshold = self.get_next_threshold(rising, falling, self.v_cap, i)
+            t = self.get_next_change(i, threshold)
+            if num < len(self.crossings):
+                t_crossing = self.update_crossings(self.crossings[num], i, version, threshold, t)
+            t = np.where(piecewise_constant & ~np.isnan(threshold) & (t == NONE), 1, t) #we cross thresholds that we have already reached with a single time unit
+            if num < len(self.crossings): #without fast-forwarding, crossings are only recomputed if the current or the thresholds changed
+                t = np.where(piecewise_constant, t, t_crossing)
+            else:
+                t = np.where(piecewise_constant, t, NONE)
+            updates.append(t)
+
+        t = np.minimum.reduce(updates)
+        max_step = np.where(piecewise_constant, self.sim_end - self.time, self.max_step)
+        return np.minimum(np.where(t == NONE, max_step, t), max_step)
+
+    #keep cached crossings that are still valid, replace the others with the given ones (see Simulation.update_crossing)
+    def update_crossings(self, crossings, i, version, threshold, t):
+        (cached_i, cached_version, cached_time, valid_until) = crossings
+        valid = (cached_i == i) & (cached_version == version) & (valid_until > self.time)
+        fresh_time = np.where(t == NONE, NONE, self.time + t)
+        cached_time[:] = np.where(valid, cached_time, fresh_time)
+        valid_until[:] = np.where(valid, valid_until, np.where(t != NONE, fresh_time, np.where(np.isnan(threshold), NONE, self.time)))
+        cached_i[:] = i
+        cached_version[:] = version
+        return np.where(cached_time == NONE, NONE, cached_time - self.time)
+
+    #next threshold that we reach from the current voltage when charging/discharging (see VoltageMonitor.get_next_threshold), NaN if there is none
+    def get_next_threshold(self, rising, falling, voltage, i):
+        (next_rising, next_falling) = self.get_next_thresholds(rising, falling, voltage)
+        return np.where(i > 0, next_rising, np.where(i < 0, next_falling, np.nan))
+
+    #next rising and falling threshold for each lane
+    def get_next_thresholds(self, rising, falling, voltage):
+        with np.errstate(invalid = 'ignore'):
+            next_rising = np.fmin.reduce(np.where(rising > voltage[:, None], rising, np.nan), axis = 1)
+            next_falling = np.fmax.reduce(np.where(falling < voltage[:, None], falling, np.nan), axis = 1)
+        return next_rising, next_falling
+
+    #check whether a threshold was crossed in the last period (see VoltageMonitor.get_event)
+    def get_voltage_event(self, rising, falling, old_voltage, new_voltage):
+        (next_rising, next_falling) = self.get_next_thresholds(rising, falling, old_voltage)
+        return ((old_voltage < new_voltage) & (new_voltage >= next_rising)) \
+            | ((old_voltage > new_voltage) & (new_voltage <= next_falling))
+
+    #time until the capacitor voltage reaches the given thresholds considering constant i (see IdealCapacitor.get_next_change)
+    def get_next_change(self, i, voltage_threshold):
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            next_change = np.trunc((self.capacitance * (voltage_threshold - self.v_cap) / i) / self.time_base)
+        valid = ~np.isnan(voltage_threshold) & (i != 0) & (next_change > 0)
+        return np.where(valid, np.minimum(np.where(valid, next_change, 0), NONE / 2).astype(np.int64), NONE)
+
+    def get_harvester_current(self, time, voltage):
+        t_cycle = time % self.harvester_period
+        square = np.where(t_cycle < self.harvester_t_high, self.harvester_i_high, self.harvester_i_low)
+        sine = self.harvester_i_high * (0.5 * (np.sin(t_cycle/self.harvester_period * 2*np.pi) + 1))
+        current = np.choose(self.harvester_shape, [self.harvester_i_high, square, sine])
+        return np.where(voltage >= self.harvester_v_ov, 0, current)
+
+    def get_input_operating_voltage(self, cap_voltage):
+        buck_boost = (self.converter_type == 2) & (self.converter_v_in != 0) & (cap_voltage >= self.converter_v_in)
+        return np.where(buck_boost, self.converter_v_in, cap_voltage)
+
+    def get_input_efficiency(self, voltage):
+        efficiency = np.where(self.converter_type == 2, self.converter_efficiency_in, 1.0)
+        return np.where((self.converter_type != 0) & (voltage >= self.converter_v_ov), 0, efficiency)
+
+    def get_output_operating_voltage(self, cap_voltage):
+        ldo = np.where(self.converter_on, np.minimum(cap_voltage, self.converter_v_out), 0.0)
+        hysteresis = np.where(self.converter_on, cap_voltage, 0.0)
+        buck_boost = np.where((self.converter_v_out == 0) | (cap_voltage < self.converter_v_out), cap_voltage, self.converter_v_out)
+        return np.choose(self.converter_type, [ldo, hysteresis, buck_boost])
+
+
+def run_batch_exploration(params, metrics, base_config, settings = {}, mapping_params = []):
+
+    batch_size = settings['batch_size'] if 'batch_size' in settings else 512
+
+    # Decode given parameters to explore accordingly and set up a simulation instance for each option
+    cache = get_result_cache(settings)
+    experiments = []
+    result_list = []
+    for num, params_to_change in enumerate(get_parameter_options(params)):
+        if cache != None: #options that were simulated before are taken from the cache
+            result = cache.get_result(get_experiment_key(params_to_change, base_config, metrics, settings, mapping_params))
+            if result != None:
+                result_list.append(result)
+                continue
+        sim, result = create_experiment(params_to_change, base_config, settings, mapping_params)
+        if sim == None:
+            result_list.append(result)
+        elif BatchSimulation.is_supported(sim):
+            experiments.append((num, params_to_change, sim, result))
+        else: #fall back to the regular simulation core
+            result_list.append(run_experiment(num, params_to_change, base_config, metrics, settings, mapping_params))
+
+    # Simulate all supported options in batches
+    start = datetime.datetime.now()
+    print(f"Simulate {len(experiments)} options in batches of {batch_size} lanes.")
+    for i in range(0, len(experiments), batch_size):
+        batch = experiments[i : i + batch_size]
+        try:
+            BatchSimulation([sim for _, _, sim, _ in batch]).run(base_config['sim_time'])
+        except Exception as e: #simulate the lanes of the batch one after the other, such that only the failing options are affected
+            print("Expection during batch simulation, simulate options of the batch separately!!!")
+            print(e)
+            for num, params_to_change, _, _ in batch:
+                result_list.append(run_experiment(num, params_to_change, base_config, metrics, settings, mapping_params))
+            continue
+        for num, params_to_change, sim, result in batch:
+            result = get_experiment_metrics(sim, metrics, settings, result)
+            if result != -1 and cache != None:
+                cache_result(cache, result, params_to_change, base_config, metrics, settings, mapping_params)
+            result_list.append(result)
+
+    print(f"Total time : {datetime.datetime.now() - start}")
+    return result_list
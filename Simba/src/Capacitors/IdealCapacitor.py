@@ -10,6 +10,7 @@ with a certain capacitance and voltage rating.
 
 from enum import Enum
 import pandas as pd
+from Recorder import LogRecorder
 
 class CapacitorEvent(Enum):
     SUCCESS = 0
@@ -35,7 +36,8 @@ class IdealCapacitor:
     def reset(self):
         self.voltage = self.voltage_initial
         self.log_dict = {'time' : 0, 'event' : CapacitorEvent.SUCCESS, 'voltage' : self.voltage, 'leakage' : 0}
-        self.log = [self.log_dict.copy()]
+        self.log = LogRecorder()
+        self.log.append(self.log_dict.copy())
         self.stats = {'energy_leaked' : 0}
         self.log_processed = False
 
@@ -51,12 +53,16 @@ class IdealCapacitor:
     def discharge_fully(self):
         self.voltage = 0
         
-    def get_leakage(self, i = 0):
+    def get_leakage(self, i = 0, voltage = None):
         return 0
+    
+    def is_piecewise_constant(self):
+        return True #no voltage-dependent leakage
 
     def update_state(self, time, dt, i): #charge_discharge
         
         i = i - self.get_leakage(i)
+        voltage = self.voltage
         self.voltage += (i * (dt * self.time_base)) / self.capacitance
                 
         if self.voltage > self.voltage_rated:
@@ -73,7 +79,8 @@ class IdealCapacitor:
             self.log_dict['i_in'] = i
             self.log.append(self.log_dict.copy())
         
-        self.stats['energy_leaked'] = self.stats['energy_leaked'] + i*self.voltage*dt*self.time_base
+        #the voltage changes linearly within the step (e.g., a whole interval when fast-forwarding), account energy at the mean voltage
+        self.stats['energy_leaked'] = self.stats['energy_leaked'] + i*(voltage + self.voltage)/2*dt*self.time_base
     
     #Compute when we would cross the voltage threshold considering constant i     
     def get_next_change(self, i, voltage_threshold): 
@@ -88,7 +95,7 @@ class IdealCapacitor:
     
     def process_log(self, time_max):
         if self.log_full:
-            self.log = pd.DataFrame(self.log)
+            self.log = self.log.to_dataframe()
             self.log.loc[:,'dt'] = abs(self.log.time.diff(-1))
             self.log.loc[self.log.index[-1], 'dt'] = time_max*self.time_base - self.log.time.iloc[-1]
         else:
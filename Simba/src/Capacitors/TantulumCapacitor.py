@@ -35,9 +35,12 @@ class TantalumCapacitor(IdealCapacitor):
         self.voltage_initial = config['v_initial'] if 'v_initial' in config else 0
         self.time_base = time_base
                 
-    def get_leakage(self, i = 0):
-        #leakage only depending on current operating voltage, rest is fixed (so far)
+    def get_leakage(self, i = 0, voltage = None):
+        #leakage only depending on current operating voltage (or the given one), rest is fixed (so far)
         leakage_ratio_tantal = 0.05 * 20 ** (2.25 / self.voltage_rated) #see 'Exploring the Effect of Energy Storage Sizing on Intermittent Computing System Performance'
         i_leakage = self.capacitance * 0.01 * self.voltage_rated * leakage_ratio_tantal
-        return i_leakage * self.voltage
+        return i_leakage * (self.voltage if voltage == None else voltage)
+    
+    def is_piecewise_constant(self):
+        return False #leakage depends on the capacitor voltage
     
@@ -23,6 +23,7 @@ from bisect import bisect_right
 import sys
 from Helper import take_closest
 from VoltageMonitor import VoltageMonitor
+from Recorder import LogRecorder
     
 class BQ25570:
     
@@ -59,20 +60,27 @@ class BQ25570:
         self.harvester_default_ocv = config['initial_ocv'] if 'initial_ocv' in config else 0.5
         
         
-        #create voltage manager to inform simulation about time of threshold crossing
-        thresholds = [("OUTPUT_OFF", self.v_ov, "both"),
-                      ("OUTPUT_ON", self.v_chgen, "both"),
-                      ("COLD_START", self.v_uv, "both"),
-                      ("COLD_START", self.v_out_enable_treshold_high, "both"),
-                      ("COLD_START", self.v_out_enable_treshold_low, "both")]
-        self.voltage_monitor = VoltageMonitor(thresholds)
-        
-        
         #Load Boost converter data, Columns: Vin, Vstor, Iin, Efficiency
         file_name = os.path.join(os.path.dirname(__file__), "converter_data", "BQ25570", f"boostConverterData.npy")
         self.boostconverter_data = np.load(file_name)
         
-        #Load Buck converter data. Columns:Vstor, Iout, Efficiency
+        #Load Buck converter data (for the configured output voltage)
+        self.buckconverter_v_out = None
+        self.load_buck_converter_data()
+        
+        #Load quiescent current data. Columns:Vstor, Iquiescent
+        file_name = os.path.join(os.path.dirname(__file__), "converter_data", "BQ25570", "quiescentData_activeMode.npy")
+        self.quiescent_data_activeMode = np.load(file_name)
+        
+        file_name = os.path.join(os.path.dirname(__file__), "converter_data", "BQ25570", "quiescentData_standbyMode.npy")
+        self.quiescent_data_standbyMode = np.load(file_name)
+    
+        
+    #Load Buck converter data. Columns:Vstor, Iout, Efficiency
+    def load_buck_converter_data(self):
+        if self.v_out == self.buckconverter_v_out:
+            return
+        
         availaible_v_out = [1.8, 2.0, 2.2, 2.4, 3.0, 3.3]
         if self.v_out not in availaible_v_out:
             print("Selected v_out is not within available values.\nFollowing values are selectable:")
@@ -82,16 +90,20 @@ class BQ25570:
         
         file_name = os.path.join(os.path.dirname(__file__), "converter_data", "BQ25570", "buckConverterData_vout=" + str(self.v_out) + ".npy")
         self.buckconverter_data = np.load(file_name)
+        self.buckconverter_v_out = self.v_out
         
-        #Load quiescent current data. Columns:Vstor, Iquiescent
-        file_name = os.path.join(os.path.dirname(__file__), "converter_data", "BQ25570", "quiescentData_activeMode.npy")
-        self.quiescent_data_activeMode = np.load(file_name)
+    def reset(self, cap_voltage, harvester_ocv):
+        #parameters might have been changed after the creation (e.g., by a trade-off exploration)
+        self.load_buck_converter_data()
         
-        file_name = os.path.join(os.path.dirname(__file__), "converter_data", "BQ25570", "quiescentData_standbyMode.npy")
-        self.quiescent_data_standbyMode = np.load(file_name)
-    
+        #create voltage manager to inform simulation about time of threshold crossing
+        thresholds = [("OUTPUT_OFF", self.v_ov, "both"),
+                      ("OUTPUT_ON", self.v_chgen, "both"),
+                      ("COLD_START", self.v_uv, "both"),
+                      ("COLD_START", self.v_out_enable_treshold_high, "both"),
+                      ("COLD_START", self.v_out_enable_treshold_low, "both")]
+        self.voltage_monitor = VoltageMonitor(thresholds)
         
-    def reset(self, cap_voltage, harvester_ocv):
         self.v_stor = cap_voltage
         self.next_ocv_sampling = 0.0
         self.harvester_ocv = harvester_ocv
@@ -102,9 +114,10 @@ class BQ25570:
         self.current_in_old = None
         self.current_out_old = None
         
-        self.log = [{'time' : 0, 
-                     'v_stor' : self.v_stor,
-                     'state' : self.get_state()}]
+        self.log = LogRecorder()
+        self.log.append({'time' : 0, 
+                        'v_stor' : self.v_stor,
+                        'state' : self.get_state()})
         self.log_processed = False
 
 
@@ -193,7 +206,7 @@ class BQ25570:
     
     def process_log(self, time_max):
         if self.log_full:
-            self.log = pd.DataFrame(self.log)
+            self.log = self.log.to_dataframe()
             self.log.loc[:, 'dt'] = abs(self.log.time.diff(-1))
             self.log.loc[self.log.index[-1],'dt'] = time_max*self.time_base - self.log.time.iloc[-1]
         else:
@@ -206,6 +219,9 @@ class BQ25570:
         
         return self.log
     
+    def is_piecewise_constant(self):
+        return False #efficiencies and quiescent currents depend on the capacitor voltage
+    
     def get_next_change(self): 
         if self.next_ocv_sampling != 0:
             return self.next_ocv_sampling
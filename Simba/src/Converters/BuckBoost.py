@@ -50,10 +50,10 @@ class BuckBoost:
         if voltage >= self.v_ov:
             return 0
         else:
-            return self.efficiency_in
+            return self.in_efficiency
         
     def get_output_efficiency(self, cap_voltage, current):
-        return self.efficiency_out
+        return self.out_efficiency
     
     def get_output_operating_voltage(self, cap_voltage):
         if self.v_out == 0 or cap_voltage < self.v_out:
@@ -64,6 +64,9 @@ class BuckBoost:
     def turn_off(self, cap_voltage):
         pass
     
+    def is_piecewise_constant(self):
+        return self.v_in == 0 and self.v_out == 0 #fixed input/output voltages scale the currents with the capacitor voltage
+    
     def get_quiescent(self, cap_voltage):
         return self.i_quiescent
     
@@ -45,6 +45,9 @@ class Diode:
     def get_output_operating_voltage(self, cap_voltage):
         return cap_voltage
     
+    def is_piecewise_constant(self):
+        return True #efficiencies and quiescent currents only change at voltage thresholds
+    
     def get_quiescent(self, cap_voltage):
         return self.i_quiescent
     
@@ -28,12 +28,13 @@ class Hysteresis:
         self.v_low = config['v_low']
         self.i_quiescent = config['i_quiescent'] if 'i_quiescent' in config else 0
         self.i_quiescent_off = config['i_quiescent_off'] if 'i_quiescent_off' in config else self.i_quiescent
-        
-        thresholds = [("ON", config['v_high'], "rising"),
-                      ("OFF", config['v_low'], "falling")]
-        self.voltage_monitor = VoltageMonitor(thresholds) #create voltage manager to inform simulation about time of threshold crossing
     
     def reset(self, cap_voltage, harvester_ocv): #todo: logging
+        #create voltage manager to inform simulation about time of threshold crossing (on reset, such that changed thresholds are applied)
+        thresholds = [("ON", self.v_high, "rising"),
+                      ("OFF", self.v_low, "falling")]
+        self.voltage_monitor = VoltageMonitor(thresholds)
+        
         if cap_voltage >= self.v_low:
             self.on = True
         else:
@@ -62,6 +63,9 @@ class Hysteresis:
              return 0.0
 
     
+    def is_piecewise_constant(self):
+        return True #efficiencies and quiescent currents only change at voltage thresholds
+    
     def get_quiescent(self, cap_voltage):
         if self.on:
             return self.i_quiescent
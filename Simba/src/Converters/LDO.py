@@ -35,17 +35,19 @@ class LDO:
             self.hysteresis = True
             self.v_high = config['v_high']
             self.v_low = config['v_low']
-        
-            thresholds = [("ON", config['v_high'], "rising"),
-                          ("OFF", config['v_low'], "falling"),
-                          ("OUT", config['v_out'], "both")]
         else:
-            thresholds = [("OUT", config['v_out'], "both")]
             self.hysteresis = False
         
-        self.voltage_monitor = VoltageMonitor(thresholds) #create voltage manager to inform simulation about time of threshold crossing
-        
     def reset(self, cap_voltage, harvester_ocv): #todo: logging
+        #create voltage manager to inform simulation about time of threshold crossing (on reset, such that changed thresholds are applied)
+        if self.hysteresis:
+            thresholds = [("ON", self.v_high, "rising"),
+                          ("OFF", self.v_low, "falling"),
+                          ("OUT", self.v_out, "both")]
+        else:
+            thresholds = [("OUT", self.v_out, "both")]
+        self.voltage_monitor = VoltageMonitor(thresholds)
+        
         if self.hysteresis:
             if cap_voltage >= self.v_low:
                 self.on = True
@@ -76,6 +78,9 @@ class LDO:
         else:
             return 0.0
 
+    def is_piecewise_constant(self):
+        return True #efficiencies and quiescent currents only change at voltage thresholds
+    
     def get_quiescent(self, cap_voltage):
         if self.on:
             return self.i_quiescent
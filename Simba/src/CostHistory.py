@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Helper class: Cost history
+
+Wall times of the experiments of previous explorations (per simulated second), which are used to estimate the wall time
+of new experiments (see `TradeoffExplorer.get_cost_rate()`). The history is stored in a file (per default
+`~/.simba/cost_history.pkl`), such that the estimates of an exploration are also based on the experiments of previous
+explorations (e.g., of previous runs of the same script), not only on the ones of the same `TradeoffExplorer`.
+
+The file is rewritten after each exploration (also by explorations running at the same time, in which case one of them
+may lose the entries of the other one); the history is only used for scheduling, i.e., it never affects any results.
+"""
+
+import os
+import pickle
+import tempfile
+
+DEFAULT_FILE = os.path.join(os.path.expanduser('~'), '.simba', 'cost_history.pkl')
+
+class CostHistory:
+
+    def __init__(self, file_path = DEFAULT_FILE, max_entries = 500):
+        self.file_path = file_path
+        self.max_entries = max_entries #per configuration, older entries are removed
+        self.entries = self.load() #configuration -> [(parameter values, wall time per simulated second)]
+        self.changed = set() #configurations with entries that are not stored yet
+
+    def load(self):
+        if self.file_path == None:
+            return {}
+        try:
+            with open(self.file_path, 'rb') as file:
+                entries = pickle.load(file)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return {} #not created yet or incomplete
+
+    def get(self, key):
+        return self.entries.get(key, [])
+
+    def add(self, key, param_values, rate):
+        entries = self.entries.setdefault(key, [])
+        entries.append((param_values, rate))
+        del entries[:-self.max_entries]
+        self.changed.add(key)
+
+    #store the new entries (along with the ones other explorations stored in the meantime for other configurations)
+    def save(self):
+        if self.file_path == None or len(self.changed) == 0:
+            return
+        entries = self.load()
+        entries.update({key : self.entries[key] for key in self.changed})
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        try:
+            os.makedirs(directory, exist_ok = True)
+            file, path = tempfile.mkstemp(dir = directory, suffix = '.tmp')
+            with os.fdopen(file, 'wb') as file:
+                pickle.dump(entries, file)
+            os.replace(path, self.file_path) #readers never see an incomplete file
+        except OSError:
+            return #e.g., read-only home directory, the estimates are only based on this explorer's experiments
+        self.entries = entries
+        self.changed = set()
@@ -11,6 +11,7 @@ The `Artificial` energy source can supply current either constantly or as a sine
 import pandas as pd
 import numpy as np
 import math
+from Recorder import LogRecorder
             
 class Artificial:
     
@@ -33,7 +34,6 @@ class Artificial:
             self.t_low = config['t_low']
             self.i_high = config['i_high']
             self.i_low = config['i_low']
-            self.period = self.t_high + self.t_low
             
         elif config['shape'] == 'sine':
             self.period = config['period']
@@ -42,15 +42,17 @@ class Artificial:
     def reset(self, initial_voltage):
         
         if self.shape == 'square':
+            self.period = self.t_high + self.t_low #derived on reset, such that changed parameters (e.g., by a trade-off exploration) are applied
             self.t_high_s = int(self.t_high / self.time_base)
             self.t_low_s = int(self.t_low / self.time_base)
             self.period_s = int(self.period / self.time_base)
         elif self.shape == 'sine':
             self.period_s = int(self.period / self.time_base)
             
-        self.log = [{'time' : 0, 
-                     'i_in' : self.get_current(0, initial_voltage),
-                     'v_in' : initial_voltage}]
+        self.log = LogRecorder()
+        self.log.append({'time' : 0, 
+                        'i_in' : self.get_current(0, initial_voltage),
+                        'v_in' : initial_voltage})
         self.log_processed = False
         self.stats = {'energy_total' : 0}
         
@@ -60,7 +62,7 @@ class Artificial:
             self.log.append({'time' : time * self.time_base, 
                              'i_in' : self.get_current(time, voltage),
                              'v_in' : voltage})
-        self.stats['energy_total'] += self.get_current(time, voltage) * voltage * dt * self.time_base      
+        self.stats['energy_total'] += self.get_current(time - dt, voltage) * voltage * dt * self.time_base #current that was supplied during the last interval
     
     def get_ocv(self, time):
         return self.v_oc
@@ -82,6 +84,9 @@ class Artificial:
             return self.i_high * (0.5 * (np.sin(t_cycle/self.period_s * 2*np.pi) + 1))
             
         
+    def is_piecewise_constant(self):
+        return self.shape != 'sine'
+        
     def get_next_change(self, time):
         if self.shape == 'const' or self.shape == 'sine':
             return None
@@ -96,10 +101,12 @@ class Artificial:
             
     def process_log(self, time_max):
         if self.log_full:
-            self.log = pd.DataFrame(self.log)
+            self.log = self.log.to_dataframe()
             self.log.loc[:,'dt'] = abs(self.log.time.diff(-1))
             self.log.loc[self.log.index[-1], 'dt'] = time_max*self.time_base - self.log.time.iloc[-1]
             self.log['p_in'] = self.log.i_in * (self.log.v_in.shift(-1) + self.log.v_in)/2 #interpolate/estimate power consumption between two different voltage points
+        else:
+            self.log = self.log.to_dataframe() #only the initial state was logged
         self.log_processed = True
             
     def get_log(self):
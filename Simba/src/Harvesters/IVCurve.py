@@ -10,6 +10,10 @@ This module thus allows to incorporate the non-linear behavior of many harvester
 
 The IV-curves are stored in *Harvesters/harvesting_data/IVCurves* as `.json`-Files. To add new IV-Curves, 
 see *Tools/get_iv_curve_XXXX.py* and the corresponding Readme.
+
+If the file name contains `XXXXX` instead of the illuminance (e.g., `Gameboy_luxXXXXX.json`), all curves of the harvester
+(`Gameboy_lux<N>.json`) are combined to a surface over (lux, voltage), such that the harvester can be used at any
+illuminance (interpolated between the two closest curves) or driven by an irradiance trace (`trace`, see `SolarPanel`).
 """
 
 import pandas as pd
@@ -18,6 +22,11 @@ import matplotlib.pyplot as plt
 import math
 import inspect
 import os
+import bisect
+from Recorder import LogRecorder
+import TraceStore
+import json
+from TraceReader import TraceReader, compact
 
 class IVCurve:
     
@@ -32,16 +41,38 @@ class IVCurve:
         self.lux = config['lux'] if 'lux' in config else 0
         self.log_full = config['log'] if 'log' in config else False
         self.time_max = math.inf
+        
+        #time-varying illuminance from an irradiance trace (lux = irradiance * lux_per_irradiance)
+        self.trace_file = config['trace'] if 'trace' in config else None
+        self.t_start = config['t_start'] if 't_start' in config else None
+        self.t_max = config['t_max'] if 't_max' in config else None
+        self.lux_per_irradiance = config['lux_per_irradiance'] if 'lux_per_irradiance' in config else 122
+        self.compact = config['compact'] if 'compact' in config else None #merge samples that differ at most by this irradiance (W/m2) from their mean
+        self.lux_trace = None
+        self.lux_time = 0
+        self.trace_lux = None #illuminance of the last looked-up sample
+        if self.trace_file != None:
+            assert 'XXXXX' in self.iv_file, "ERROR: An irradiance trace requires IV curves of several illuminances (file name with XXXXX)."
+            self.read_lux_trace_file()
+            self.load_lux_trace()
+        
+        self.iv_curve_file = None
+        self.surface_file = None
+        self.curve_lux = None
+        self.load_iv_curve()
             
     def reset(self, initial_voltage):
         
-        #TODO: remove this ugly hack and make loading dep. on lux properly
+        if self.trace_file != None:
+            self.load_lux_trace()
+            self.next_update = 0
         self.load_iv_curve()
         
-        self.log = [{'time' : 0, 
-                     'i_in' : self.get_current(0, initial_voltage), 
-                     'v_in' : initial_voltage, 
-                     'p_max' : self.get_max_power()}]
+        self.log = LogRecorder()
+        self.log.append({'time' : 0, 
+                        'i_in' : self.get_current(0, initial_voltage), 
+                        'v_in' : initial_voltage, 
+                        'p_max' : self.get_max_power()})
         self.log_processed = False
         self.stats = {'energy_total' : 0,
                       'energy_max' : 0}
@@ -62,10 +93,12 @@ class IVCurve:
             
     def process_log(self, time_max):
         if self.log_full:
-            self.log = pd.DataFrame(self.log)
+            self.log = self.log.to_dataframe()
             self.log.loc[:,'dt'] = abs(self.log.time.diff(-1))
             self.log.loc[self.log.index[-1], 'dt'] = time_max * self.time_base - self.log.time.iloc[-1]
             self.log['p_in'] = self.log.i_in * (self.log.v_in.shift(-1) + self.log.v_in)/2 #interpolate/estimate power consumption between two different voltage points
+        else:
+            self.log = self.log.to_dataframe() #only the initial state was logged
         self.log_processed = True
             
     def get_log(self):
@@ -78,42 +111,192 @@ class IVCurve:
         return self.stats
     
     def get_ocv(self, time):
-        if hasattr(self, 'iv_curve'):
-            return self.iv_curve.voltage.max() 
-        else:
-            self.load_iv_curve()
-            return self.iv_curve.voltage.max()
+        self.load_iv_curve() #only loads the IV curve if the lux value/file was changed
+        self.update_lux(time)
+        return self.ocv
                
     def get_current(self, time, voltage = 0):
         
-        # Interpolate between closest points on IV curve
-        self.current = np.interp(voltage, self.iv_curve['voltage'], self.iv_curve['current'])
-            
+        self.update_lux(time)
+        
+        # Interpolate between closest points on IV curve (same as np.interp, but starting at the segment of the last call,
+        # as the voltage mostly changes only slightly between two steps)
+        points = self.points_voltage
+        idx = self.segment
+        if not points[idx] <= voltage < points[idx + 1]:
+            if voltage < points[0]:
+                self.current = self.points_current[0]
+                return self.current
+            elif voltage >= points[-1]:
+                self.current = self.points_current[-1]
+                return self.current
+            elif points[idx + 1] <= voltage < points[idx + 2]:
+                idx += 1
+            elif idx > 0 and points[idx - 1] <= voltage < points[idx]:
+                idx -= 1
+            else:
+                idx = bisect.bisect_right(points, voltage) - 1
+            self.segment = idx
+        
+        self.current = self.points_slope[idx] * (voltage - points[idx]) + self.points_current[idx]
         return self.current 
+    
+    #currents at many voltages at once (e.g., to evaluate the IV curve for an analysis)
+    def get_currents(self, time, voltages):
+        self.update_lux(time)
+        return np.interp(voltages, self.iv_voltage, self.iv_current)
         
     def get_max_power(self):
         return self.max_power
         
     def get_next_change(self, time):
-        return None
+        if self.lux_trace == None or time >= self.time_max:
+            return None
+        return self.lux_trace.get_next_time() - time #next sample of the irradiance trace
+    
+    def is_piecewise_constant(self):
+        return False #current depends on the operating voltage
             
     def load_iv_curve(self):
         
-        if 'XXXXX' in self.iv_file:
-            file = self.iv_file.replace('XXXXX', str(self.lux)) #TODO: make properly
-        else:
-            file = self.iv_file
+        if 'XXXXX' in self.iv_file: #curves of several illuminances
+            self.load_iv_surface()
+            lux = self.lux if self.lux_trace == None else self.trace_lux
+            if lux != None:
+                self.set_lux(lux)
+            return
+        if self.iv_file == self.iv_curve_file: #already loaded (the file only changes if it was changed after creation)
+            return
+        
+        voltage, current = self.read_iv_file(self.iv_file)
+        self.set_iv_curve(voltage, current, voltage.max(), (current * voltage).max())
+        self.iv_curve_file = self.iv_file
+        
+    #use the given IV curve, with precomputed open-circuit voltage, maximum power point and slopes of its segments
+    def set_iv_curve(self, voltage, current, ocv, max_power):
+        self.iv_voltage = np.ascontiguousarray(voltage, dtype = float)
+        self.iv_current = np.ascontiguousarray(current, dtype = float)
+        self.ocv = ocv
+        self.max_power = max_power
+        self.mpp_voltage = self.iv_voltage[np.argmax(self.iv_current * self.iv_voltage)]
+        
+        #lookup tables of get_current() (as lists, which are faster to index than arrays), the last point is repeated,
+        #such that a segment (idx, idx + 1) always exists
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            slope = np.diff(self.iv_current) / np.diff(self.iv_voltage)
+        self.points_voltage = self.iv_voltage.tolist() + [self.iv_voltage[-1]]
+        self.points_current = self.iv_current.tolist() + [self.iv_current[-1]]
+        self.points_slope = slope.tolist() + [0.0]
+        self.segment = 0
+        
+    #IV curve as DataFrame (voltage, current), e.g., for plots
+    @property
+    def iv_curve(self):
+        return pd.DataFrame({'voltage' : self.iv_voltage, 'current' : self.iv_current})
         
+    def read_iv_file(self, file):
         file_path = os.path.join(os.path.dirname(inspect.getfile(self.__class__)),f"harvesting_data/IVCurves/{file}")          
+        _, columns = TraceStore.get_trace(file_path, self.read_iv_curve) #read once, compiled to a binary file (see TraceStore.py)
+        return np.asarray(columns['voltage']), np.asarray(columns['current'])
+        
+    #load all curves of the harvester (files with the lux value instead of XXXXX) as a grid over (lux, voltage):
+    #the voltages of all curves are merged, such that each curve is exactly represented by its row
+    def load_iv_surface(self):
+        if self.iv_file == self.surface_file: #already loaded
+            return
+        
+        directory, pattern = os.path.split(self.iv_file)
+        prefix, suffix = pattern.split('XXXXX')
+        files = os.listdir(os.path.join(os.path.dirname(inspect.getfile(self.__class__)), "harvesting_data/IVCurves", directory))
+        luxes = sorted(int(file[len(prefix):len(file) - len(suffix)]) for file in files 
+                       if file.startswith(prefix) and file.endswith(suffix) and file[len(prefix):len(file) - len(suffix)].isdigit())
+        assert len(luxes) > 0, f"ERROR: No IV curves found for {self.iv_file}."
+        curves = [self.read_iv_file(self.iv_file.replace('XXXXX', str(lux))) for lux in luxes]
+        if luxes[0] > 0: #no current without light
+            luxes.insert(0, 0)
+            curves.insert(0, (np.array([0.0]), np.array([0.0])))
+        
+        self.surface_lux = np.array(luxes, dtype = float)
+        self.surface_curves = curves
+        self.surface_voltage = np.unique(np.concatenate([voltage for voltage, _ in curves]))
+        self.surface_current = np.array([np.interp(self.surface_voltage, voltage, current) for voltage, current in curves])
+        self.surface_ocv = np.array([voltage.max() for voltage, _ in curves])
+        self.surface_file = self.iv_file
+        self.curve_lux = None
+        
+    #IV curve at the given illuminance: the measured curve, or interpolated (bilinear) between the two closest curves
+    def set_lux(self, lux):
+        if lux == self.curve_lux:
+            return
+        
+        idx = min(max(int(np.searchsorted(self.surface_lux, lux, side = 'right')) - 1, 0), len(self.surface_lux) - 1)
+        if lux <= self.surface_lux[idx] or idx == len(self.surface_lux) - 1: #measured (or beyond the measured illuminances)
+            voltage, current = self.surface_curves[idx]
+            self.set_iv_curve(voltage, current, voltage.max(), (current * voltage).max())
+        else:
+            weight = (lux - self.surface_lux[idx]) / (self.surface_lux[idx + 1] - self.surface_lux[idx])
+            current = (1 - weight) * self.surface_current[idx] + weight * self.surface_current[idx + 1]
+            ocv = (1 - weight) * self.surface_ocv[idx] + weight * self.surface_ocv[idx + 1]
+            self.set_iv_curve(self.surface_voltage, current, ocv, (current * self.surface_voltage).max())
+        self.curve_lux = lux
+        
+    #look up the illuminance of the irradiance trace at the given time (only if the next sample is reached)
+    def update_lux(self, time):
+        if self.lux_trace == None or self.lux_time <= time < self.next_update:
+            return
+        self.lux_time = time
+        self.trace_lux = self.lux_trace.get_value(time) * self.lux_per_irradiance
+        self.set_lux(self.trace_lux)
+        self.next_update = self.lux_trace.get_next_time()
+        
+    #read the irradiance trace once (on creation), the trace is cropped to t_start/t_max on every reset
+    def read_lux_trace_file(self):
+        file_path = os.path.join(os.path.dirname(inspect.getfile(self.__class__)),f"harvesting_data/SolarTraces/{self.trace_file}")
+        self.trace_info, columns = TraceStore.get_trace(file_path, self.read_lux_trace)
+        self.trace_time = columns['time']
+        self.trace_irradiance = columns['irradiance']
+        self.loaded_trace_file = self.trace_file
+        
+    def read_lux_trace(self, file_path):
+        with open(file_path, 'r') as file:
+            info = json.loads(file.readline())
+            df = pd.read_json(file)
+            if self.verbose:
+                print(f"Successfully loaded irradiance data from {self.trace_file}.")
+        return info, {'time' : df.index.to_numpy(), 'irradiance' : df.irradiance.to_numpy()}
+        
+    def load_lux_trace(self):
+        if self.trace_file != self.loaded_trace_file: #file was changed after creation (e.g., by the trade-off exploration)
+            self.read_lux_trace_file()
+        time = self.trace_time
+        irradiance = self.trace_irradiance
+        
+        if self.t_start != None:
+            assert self.trace_info['TraceLength'] >= self.t_start , "ERROR: Starting time of irradiance trace exceeds trace length." 
+            idx = np.searchsorted(time, self.t_start, side = 'left')
+            time = time[idx:] - time[idx]
+            irradiance = irradiance[idx:]
+        
+        if self.t_max != None:
+            assert time.max() >= self.t_max, "ERROR: Simulation time of irradiance trace exceeds trace length."
+            idx = np.searchsorted(time, self.t_max, side = 'right')
+            time = time[:idx] #crop
+            irradiance = irradiance[:idx]
+        
+        if self.compact != None:
+            self.lux_trace = TraceReader(*compact(time / self.time_base, irradiance, self.compact), int(time.max() / self.time_base))
+        else:
+            self.lux_trace = TraceReader(time / self.time_base, irradiance, int(time.max() / self.time_base))
+        self.time_max = self.lux_trace.time_end
+        
+    def read_iv_curve(self, file_path):
         df = pd.read_json(file_path, convert_axes=False)
         df = df.reset_index().astype(float)
         df = df.rename({"index" : "voltage", "0" : "current"}, axis=1)
         df['current'] = abs(df.current)
         if self.verbose:
-            print(f"Successfully loaded IV curve from {file}.")
-                  
-        self.iv_curve = df # TODO: convert to numpy array for faster simulation speed
-        self.max_power = (df.current * df.voltage).max()
+            print(f"Successfully loaded IV curve from {os.path.basename(file_path)}.")
+        return {}, {'voltage' : df.voltage.to_numpy(), 'current' : df.current.to_numpy()}
         
     def plot_iv_curve(self, ax=None):
         if ax == None:
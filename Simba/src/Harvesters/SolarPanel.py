@@ -15,8 +15,13 @@ import json
 import matplotlib.pyplot as plt
 import os
 import inspect
+from Recorder import LogRecorder
+import TraceStore
+from TraceReader import TraceReader, compact
                     
 class SolarPanel:
+    
+    shared_data = ['irradiance'] #built on reset, but does not change during a simulation (i.e., snapshots share it)
      
     def __init__(self, config, verbose, time_base):
         self.verbose = verbose
@@ -30,6 +35,8 @@ class SolarPanel:
         self.t_start = config['t_start'] if 't_start' in config else None
         self.t_max = config['t_max'] if 't_max' in config else None
         self.file = config['file']
+        self.compact = config['compact'] if 'compact' in config else None #merge samples that differ at most by this irradiance (W/m2) from their mean
+        self.read_irradiance_file()
         
         #Configure panel related data from datasheet (I_sc, V_oc etc.)
         self.i_sc = config['i_sc']
@@ -45,28 +52,42 @@ class SolarPanel:
                 self.i_sc *= config['num_cells']
                 self.i_mpp *= config['num_cells']
              
-        #compute look-up-table for delivered current depending on input voltage
-        #(See: A Complete and Simplified Datasheet-Based Model of PV Cells in Variable Environmental Conditions for Circuit Simulation)
-        self.v_factor = np.array([self.i_sc * (1 - np.exp(np.log(1 - self.i_mpp/self.i_sc) * (voltage - self.v_oc_nom) / (self.v_mpp - self.v_oc_nom))) for voltage in np.arange(0, self.v_oc_nom, 0.01)])
+        self.v_factor_params = None
+        self.compute_v_factor()
                     
+    #compute look-up-table for delivered current depending on input voltage (again, if the cell parameters were changed after the creation)
+    #(See: A Complete and Simplified Datasheet-Based Model of PV Cells in Variable Environmental Conditions for Circuit Simulation)
+    def compute_v_factor(self):
+        params = (self.i_sc, self.i_mpp, self.v_mpp, self.v_oc_nom)
+        if params == self.v_factor_params:
+            return
+        self.v_factor = np.array([self.i_sc * (1 - np.exp(np.log(1 - self.i_mpp/self.i_sc) * (voltage - self.v_oc_nom) / (self.v_mpp - self.v_oc_nom))) for voltage in np.arange(0, self.v_oc_nom, 0.01)])
+        self.v_factor_params = params
 
     def reset(self, initial_voltage):
         
+        self.compute_v_factor()
         self.load_irradiance_data()
+        self.next_update = 0
         self.current_irradiance = self.irradiance[1][0]
         #(See: Effect of Illumination Intensity on Solar Cells Parameters)
         #Using formula 12 and added a scaling factor depending on v_oc at standard test condition of 1000 irradiation
         #self.v_oc = self.v_oc_nom + 0.02569 * np.log(self.current_irradiance / 1000.0) * self.v_oc_nom / 0.616
         self.v_oc = self.v_oc_nom 
-        self.log = [{'time' : 0, 
-                    'i_in' : self.get_current(0, initial_voltage), 
-                    'v_in' : initial_voltage, 
-                    'i_max' : self.get_current(0, self.v_mpp),
-                    'irr' :  self.current_irradiance}]
+        self.log = LogRecorder()
+        self.log.append({'time' : 0, 
+                       'i_in' : self.get_current(0, initial_voltage), 
+                       'v_in' : initial_voltage, 
+                       'i_max' : self.get_current(0, self.v_mpp),
+                       'irr' :  self.current_irradiance})
         self.log_processed = False
         self.stats = {'energy_total' : 0, 'energy_max' : 0}
         
     def update_state(self, time, dt, voltage):
+        #account energy with the currents that were supplied during the last interval (before looking up the next sample)
+        self.stats['energy_total'] += self.get_current(time - dt, voltage) * voltage * dt * self.time_base
+        self.stats['energy_max']   += self.get_current(time - dt, self.v_mpp * self.v_oc/self.v_oc_nom) * self.v_mpp * self.v_oc/self.v_oc_nom * dt * self.time_base
+        
         i_new = self.get_current(time, voltage)
         i_max_new = self.get_current(time, self.v_mpp * self.v_oc/self.v_oc_nom)
         if self.log_full:
@@ -76,17 +97,17 @@ class SolarPanel:
                                  'v_in' : voltage,
                                  'i_max' : i_max_new,
                                  'irr' :  self.current_irradiance})
-        self.stats['energy_total'] += i_new * voltage * dt * self.time_base
-        self.stats['energy_max']   += i_max_new * self.v_mpp * self.v_oc/self.v_oc_nom * dt * self.time_base
                     
             
     def process_log(self, time_max):
         if self.log_full:
-            self.log = pd.DataFrame(self.log)
+            self.log = self.log.to_dataframe()
             self.log.loc[:,'dt'] = abs(self.log.time.diff(-1))
             self.log.loc[self.log.index[-1], 'dt'] = time_max - self.log.time.iloc[-1]
             self.log['p_in'] = self.log.i_in * (self.log.v_in.shift(-1) + self.log.v_in)/2 #interpolate/estimate power consumption between two different voltage points
             self.log['p_max'] = self.log.i_max *  self.v_mpp
+        else:
+            self.log = self.log.to_dataframe() #only the initial state was logged
         self.log_processed = True
             
     def get_log(self):
@@ -129,13 +150,9 @@ class SolarPanel:
     def get_current(self, time, voltage = 0):
                 
         if time >= self.next_update:
-            idx = np.argwhere(self.irradiance[0] >= time)[0][0]
-            self.current_irradiance = self.irradiance[1][idx]
+            self.current_irradiance = self.trace.get_value(time)
             self.current_current = self.current_irradiance / 1000.0 * self.v_factor[int((voltage/self.v_oc_nom) * len(self.v_factor))]
-            if idx < len(self.irradiance[0]) - 1:
-                self.next_update = int(self.irradiance[0][idx + 1])
-            else:
-                self.next_update = int(self.time_max)
+            self.next_update = self.trace.get_next_time()
         
         #we compute the current dep. on irradiance 
         #(See: A Complete and Simplified Datasheet-Based Model of PV Cells in Variable Environmental Conditions for Circuit Simulation)
@@ -143,35 +160,59 @@ class SolarPanel:
             return 0
         return self.current_current
             
+    def is_piecewise_constant(self):
+        return True #current is only updated at the samples of the irradiance trace
+            
     def get_next_change(self, time):
         if time >= self.time_max:
             return None
-        return self.next_update - time
+        return self.trace.get_next_time() - time #next sample after the one looked up last
             
-    def load_irradiance_data(self):
+    #read the trace file once (on creation), the trace is cropped to t_start/t_max on every reset
+    def read_irradiance_file(self):
             
             file_path = os.path.join(os.path.dirname(inspect.getfile(self.__class__)),f"harvesting_data/SolarTraces/{self.file}")          
-        
+            self.trace_info, columns = TraceStore.get_trace(file_path, self.read_trace) #shared with other processes if published
+            self.trace_time = columns['time']
+            self.trace_irradiance = columns['irradiance']
+            self.trace_file = self.file
+    
+    def read_trace(self, file_path):
+            
             with open(file_path, 'r') as file:
                 info = json.loads(file.readline())
                 df = pd.read_json(file)
                 if self.verbose:
                     print(f"Successfully loaded irradiance data from {self.file}.")
+            return info, {'time' : df.index.to_numpy(), 'irradiance' : df.irradiance.to_numpy()}
+    
+    def load_irradiance_data(self):
+            
+            if self.file != self.trace_file: #file was changed after creation (e.g., by the trade-off exploration)
+                self.read_irradiance_file()
+            info = self.trace_info
+            time = self.trace_time #slices are views of the (shared) trace
+            irradiance = self.trace_irradiance
                   
             if self.t_start != None:
                 assert info['TraceLength'] >= self.t_start , "ERROR: Starting time of solar source exceeds trace length." 
-                df = df[df.index >= self.t_start].copy()
-                df.index = df.index - df.index[0] #er start at t=0
+                idx = np.searchsorted(time, self.t_start, side = 'left')
+                time = time[idx:] - time[idx] #er start at t=0
+                irradiance = irradiance[idx:]
             
             if self.t_max != None:
-                assert df.index.max() >= self.t_max, "ERROR: Simulation time of solar source exceeds trace length."
-                df = df[df.index <= self.t_max].copy() #crop
+                assert time.max() >= self.t_max, "ERROR: Simulation time of solar source exceeds trace length."
+                idx = np.searchsorted(time, self.t_max, side = 'right')
+                time = time[:idx] #crop
+                irradiance = irradiance[:idx]
               
             # Convert time to integer according to time base from simulation   
-            df.index = (df.index / self.time_base)
-            
-            self.irradiance = np.array([df.index, df.irradiance]) #convert to np array for faster simulation speeds
+            self.irradiance = np.array([time / self.time_base, irradiance]) #convert to np array for faster simulation speeds
             self.time_max = int(self.irradiance[0].max()) #0 .. time, 1 ... irradiance
+            if self.compact != None:
+                self.trace = TraceReader(*compact(self.irradiance[0], self.irradiance[1], self.compact), self.time_max)
+            else:
+                self.trace = TraceReader(self.irradiance[0], self.irradiance[1], self.time_max)
             
             
     def plot_irradiance_trace(self, axs = []):
@@ -12,6 +12,8 @@ import numpy as np
 import json
 import matplotlib.pyplot as plt
 import math
+from Recorder import LogRecorder
+from TraceReader import TraceReader, compact
       
 class TEG:
      
@@ -23,6 +25,7 @@ class TEG:
             
         self.log_full = config['log'] if 'log' in config else True
         self.data_type = config['data_type']
+        self.compact = config['compact'] if 'compact' in config else None #merge samples that differ at most by this current (A) from their mean
         self.next_update = 0
         
         if self.data_type == 'Impp':
@@ -32,29 +35,37 @@ class TEG:
             assert False, "Raw TEG data not implemented yet."
             
     def reset(self, initial_voltage):
-        self.log = [{'time' : 0, 
-                     'i_in' : self.get_current(0, initial_voltage), 
-                     'v_in' : initial_voltage}]
+        self.next_update = 0
+        if self.compact != None:
+            self.trace = TraceReader(*compact(self.i_trace[0], self.i_trace[1], self.compact), self.time_max)
+        else:
+            self.trace = TraceReader(self.i_trace[0], self.i_trace[1], self.time_max)
+        self.log = LogRecorder()
+        self.log.append({'time' : 0, 
+                        'i_in' : self.get_current(0, initial_voltage), 
+                        'v_in' : initial_voltage})
         self.log_processed = False
         self.stats = {'energy_total' : 0}
         
     def update_state(self, time, dt, voltage):
+        self.stats['energy_total'] += self.get_current(time - dt, voltage) * voltage * dt * self.time_base #current that was supplied during the last interval
         i_new = self.get_current(time, voltage)
         if self.log_full:
             if i_new != self.log[-1]['i_in']:
                 self.log.append({'time' : time * self.time_base, 
                                  'i_in' : i_new,
                                  'v_in' : voltage})
-        self.stats['energy_total'] += i_new * voltage * time * self.time_base
                 
             
     def process_log(self, time_max):
         if self.log_full:
-            self.log = pd.DataFrame(self.log)
+            self.log = self.log.to_dataframe()
             self.log.loc[:,'dt'] = abs(self.log.time.diff(-1))
             self.log.loc[self.log.index[-1], 'dt'] = time_max * self.time_base - self.log.time.iloc[-1]
             self.log['p_in'] = self.log.i_in * self.log.i_in * (self.log.v_in.shift(-1) + self.log.v_in)/2 #interpolate/estimate power consumption between two different voltage points
-            self.log_processed = True
+        else:
+            self.log = self.log.to_dataframe() #only the initial state was logged
+        self.log_processed = True
             
     def get_log(self):
         if not self.log_processed:
@@ -74,19 +85,18 @@ class TEG:
         # we look up the next current value only if it has changed to improve simulation speed
         # store next update time in self.next_update
         if time >= self.next_update:
-            idx = np.argwhere(self.i_trace[0] >= time)[0][0]
-            self.current = self.i_trace[1][idx]
-            if idx < len(self.i_trace[0]) - 1:
-                self.next_update = int(self.i_trace[0][idx + 1])
-            else:
-                self.next_update = int(self.time_max)
+            self.current = self.trace.get_value(time)
+            self.next_update = self.trace.get_next_time()
         
         return self.current
             
+    def is_piecewise_constant(self):
+        return True #current is only updated at the samples of the trace
+            
     def get_next_change(self, time):
         if time >= self.time_max:
             return None
-        return self.next_update - time
+        return self.trace.get_next_time() - time #next sample after the one looked up last
             
     def load_impp_data(self, config):
             df = pd.read_hdf(config['file'])
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Helper classes: Job queue
+
+Queue of jobs (function, arguments) in a SQLite file that is shared by the main process of an exploration and any number
+of worker processes, possibly on different machines (the file has to be on a shared filesystem that supports file locks).
+The main process submits the jobs of an exploration (see `TradeoffExplorer(queue = <FILE>)`) and collects their results,
+the workers (`simba-worker <FILE>` or `python JobQueue.py <FILE>`) claim the pending jobs one after the other, run them,
+and store their results (or the tracebacks of their exceptions) in the file.
+
+Jobs and results are pickled, i.e., the main process and all workers have to use the same version of Simba (and the
+paths in the configurations, e.g., of traces, have to be valid on all machines). While a worker runs a job, it regularly
+updates the job's heartbeat; jobs of workers that stopped (e.g., a crashed machine) are claimed again by other workers.
+"""
+
+import os
+import sys
+import time
+import uuid
+import pickle
+import socket
+import sqlite3
+import argparse
+import threading
+import traceback
+import multiprocessing as mp
+
+#modules of Simba are imported by their names, also in the worker processes (which import this module first, e.g., when started
+#by the simba-worker entry point or with the spawn start method)
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HEARTBEAT_INTERVAL = 10 #s between two heartbeats of a worker running a job
+HEARTBEAT_TIMEOUT = 60 #s without heartbeat after which a running job is claimed again
+POLL_INTERVAL = 0.5 #s between two checks for finished jobs (main process) or pending jobs (workers)
+
+class JobQueue:
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.connection = sqlite3.connect(file_path, timeout = 60, isolation_level = None) #autocommit, transactions are explicit
+        self.connection.execute("CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, run TEXT, traces TEXT, job BLOB, "
+                                "state TEXT, worker TEXT, heartbeat REAL, output BLOB, error TEXT)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, run)")
+
+    def close(self):
+        self.connection.close()
+
+    #add a job (function, arguments) of the given run; traces is the directory of the traces published for this run
+    def submit(self, run, job, traces = None):
+        cursor = self.connection.execute("INSERT INTO jobs (run, traces, job, state) VALUES (?, ?, ?, 'pending')", (run, traces, pickle.dumps(job)))
+        return cursor.lastrowid
+
+    #claim the oldest pending job, returns (id, traces, pickled job) or None
+    def claim(self, worker):
+        self.connection.execute("BEGIN IMMEDIATE") #no other process can claim the same job
+        try:
+            row = self.connection.execute("SELECT id, traces, job FROM jobs WHERE state = 'pending' ORDER BY id LIMIT 1").fetchone()
+            if row != None:
+                self.connection.execute("UPDATE jobs SET state = 'running', worker = ?, heartbeat = ? WHERE id = ?", (worker, time.time(), row[0]))
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return row
+
+    def heartbeat(self, job_id):
+        self.connection.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND state = 'running'", (time.time(), job_id))
+
+    #store the pickled output (or the traceback) of a claimed job; jobs that were cancelled in the meantime are not stored
+    def finish(self, job_id, output = None, error = None):
+        if error != None:
+            self.connection.execute("UPDATE jobs SET state = 'failed', error = ?, job = NULL WHERE id = ? AND state = 'running'", (error, job_id))
+        else:
+            self.connection.execute("UPDATE jobs SET state = 'done', output = ?, job = NULL WHERE id = ? AND state = 'running'", (output, job_id))
+
+    #remove and return the finished jobs of the given run as [(id, output, error)]
+    def collect(self, run):
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.connection.execute("SELECT id, output, error FROM jobs WHERE run = ? AND state IN ('done', 'failed')", (run,)).fetchall()
+            self.connection.executemany("DELETE FROM jobs WHERE id = ?", [(row[0],) for row in rows])
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return [(job_id, pickle.loads(output) if output != None else None, error) for job_id, output, error in rows]
+
+    #running jobs of the given run whose worker stopped (no heartbeat) are pending again
+    def requeue(self, run, timeout = HEARTBEAT_TIMEOUT):
+        cursor = self.connection.execute("UPDATE jobs SET state = 'pending', worker = NULL WHERE run = ? AND state = 'running' AND heartbeat < ?", (run, time.time() - timeout))
+        return cursor.rowcount
+
+    #remove all (remaining) jobs of the given run
+    def cancel(self, run):
+        self.connection.execute("DELETE FROM jobs WHERE run = ?", (run,))
+
+    #number of jobs per state
+    def get_counts(self):
+        return dict(self.connection.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+class QueueResult:
+
+    def __init__(self, pool, callback, error_callback):
+        self.pool = pool
+        self.callback = callback
+        self.error_callback = error_callback
+        self.finished = False
+        self.value = None
+
+    def ready(self):
+        return self.finished
+
+    def successful(self):
+        return self.finished and not isinstance(self.value, Exception)
+
+    def wait(self, timeout = None):
+        start = time.time()
+        while not self.finished and (timeout == None or time.time() - start < timeout):
+            if self.pool.update() == 0:
+                time.sleep(POLL_INTERVAL)
+
+#exception raised by a job in a worker (the traceback is the worker's one)
+class JobError(Exception):
+    pass
+
+#the subset of multiprocessing.Pool used by a TradeoffExplorer, but the jobs are run by the workers of a job queue;
+#callbacks are called by the main process while it waits for the results
+class QueuePool:
+
+    def __init__(self, file_path, trace_directory = None):
+        self.queue = JobQueue(file_path)
+        self.trace_directory = trace_directory
+        self.run = uuid.uuid4().hex #jobs submitted by this pool
+        self.results = {} #id -> QueueResult of the submitted jobs
+
+    def apply_async(self, function, args = (), callback = None, error_callback = None):
+        result = QueueResult(self, callback, error_callback)
+        self.results[self.queue.submit(self.run, (function, args), self.trace_directory)] = result
+        return result
+
+    #receive the finished jobs, returns their number
+    def update(self):
+        self.queue.requeue(self.run)
+        finished = self.queue.collect(self.run)
+        for job_id, output, error in finished:
+            result = self.results.pop(job_id, None)
+            if result == None:
+                continue
+            result.finished = True
+            if error != None:
+                result.value = JobError(error)
+                if result.error_callback != None:
+                    result.error_callback(result.value)
+            else:
+                result.value = output
+                if result.callback != None:
+                    result.callback(output)
+        return len(finished)
+
+    #remove the jobs that are not finished yet
+    def terminate(self):
+        self.queue.cancel(self.run)
+        self.results = {}
+
+    def close(self):
+        self.terminate()
+        self.queue.close()
+
+    def join(self):
+        pass
+
+#run the jobs of the queue until it stays empty for the given time (s, None = forever)
+def work(file_path, idle_timeout = None):
+    import Simba #(the jobs' functions are defined there)
+    import TraceStore
+    Simba.init_worker(None)
+    queue = JobQueue(file_path)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    idle_since = time.time()
+    while idle_timeout == None or time.time() - idle_since < idle_timeout:
+        claimed = queue.claim(worker)
+        if claimed == None:
+            time.sleep(POLL_INTERVAL)
+            continue
+        job_id, traces, job = claimed
+
+        #keep the job alive while it is running (in a separate connection, SQLite connections are not shared between threads)
+        done = threading.Event()
+        def heartbeat():
+            connection = JobQueue(file_path)
+            while not done.wait(HEARTBEAT_INTERVAL):
+                connection.heartbeat(job_id)
+            connection.close()
+        thread = threading.Thread(target = heartbeat, daemon = True)
+        thread.start()
+        try:
+            TraceStore.attach(traces if traces != None and os.path.isdir(traces) else None)
+            function, args = pickle.loads(job)
+            output, error = pickle.dumps(function(*args)), None #outputs that cannot be pickled fail the job (not the worker)
+        except Exception:
+            output, error = None, traceback.format_exc()
+        finally:
+            done.set()
+            thread.join()
+        queue.finish(job_id, output, error)
+        idle_since = time.time()
+    queue.close()
+
+#%%
+parser = argparse.ArgumentParser(
+                    prog='simba-worker',
+                    description='Runs the experiments submitted to a Simba job queue (see TradeoffExplorer(queue = <FILE>)).')
+
+parser.add_argument("queue", help='SQLite file of the job queue (created if it does not exist).')
+parser.add_argument("-p", "--processes", type=int, help='Number of worker processes on this machine (Default = number of CPUs).', required=False, default=mp.cpu_count())
+parser.add_argument("--idle-timeout", type=float, help='Stop once the queue has been empty for this time in seconds (Default = run until stopped).', required=False, default=None)
+
+def main():
+    args = parser.parse_args()
+    JobQueue(args.queue).close() #create the queue before the workers use it
+    print(f"Start {args.processes} workers for {args.queue}.")
+    workers = [mp.Process(target = work, args = (args.queue, args.idle_timeout)) for _ in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+if __name__ == '__main__':
+    main()
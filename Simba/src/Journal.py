@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Helper class: Journal
+
+Journal of a trade-off exploration in a JSON lines file: each finished experiment is appended (and flushed) as soon as
+its result is received, i.e., the results survive a crash or an interrupted exploration. Each line contains the key
+of the experiment (see `get_experiment_key()`, without the versions of the source files), its parameter values, the
+version of Simba it was simulated with, and either its result or the traceback of the exception it raised. Re-running an
+exploration with the same journal skips the experiments that already finished successfully (failed experiments are
+simulated again), even if the source files were changed in the meantime (the exploration warns about such results).
+"""
+
+import os
+import json
+import time
+import numpy as np
+
+#JSON value of results that contain NumPy or pandas values
+def to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    elif isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+class Journal:
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.results = {} #key -> result of finished experiments
+        self.errors = {} #key -> traceback of failed experiments
+        self.versions = {} #key -> version of Simba that simulated the finished experiment
+        terminated = True
+        if os.path.isfile(file_path):
+            with open(file_path, 'r') as file:
+                for line in file:
+                    terminated = line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue #incomplete line of an interrupted exploration
+                    if 'error' in entry:
+                        self.errors[entry['key']] = entry['error']
+                    else:
+                        self.results[entry['key']] = entry['result']
+                        self.versions[entry['key']] = entry['version'] if 'version' in entry else None
+                        self.errors.pop(entry['key'], None)
+        if os.path.dirname(file_path) != '':
+            os.makedirs(os.path.dirname(file_path), exist_ok = True)
+        self.file = open(file_path, 'a')
+        if not terminated:
+            self.file.write("\n") #terminate an incomplete line of an interrupted exploration
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def record(self, key, params, result = None, error = None, version = None):
+        entry = {'key' : key, 'time' : time.time(), 'params' : params, 'version' : version}
+        if error != None:
+            entry['error'] = error
+            self.errors[key] = error
+        else:
+            entry['result'] = result
+            self.results[key] = result
+            self.versions[key] = version
+        self.file.write(json.dumps(entry, default = to_json) + "\n")
+        self.file.flush()
@@ -10,11 +10,12 @@ TODO: description
 from aenum import Enum
 import pandas as pd
 from VoltageMonitor import VoltageMonitor
+from Recorder import LogRecorder
                    
 class AdvancedJITLoad:
     
-    States = Enum("State", ['OFF', 'ON', 'RESTORE', 'SAVE', 'SLEEP'])
-    Events = Enum("Events", ['NONE', 'SAVE_START', 'RESTORE_START', 'SAVE_SUCCESS', 'RESTORE_SUCCESS', 'SAVE_FAIL', 'RESTORE_FAIL', 'APPLICATION_EVENT', 'FORCED_OFF'])
+    States = Enum("State", ['OFF', 'ON', 'RESTORE', 'SAVE', 'SLEEP'], qualname = "AdvancedJITLoad.States") #qualname required for pickling
+    Events = Enum("Events", ['NONE', 'SAVE_START', 'RESTORE_START', 'SAVE_SUCCESS', 'RESTORE_SUCCESS', 'SAVE_FAIL', 'RESTORE_FAIL', 'APPLICATION_EVENT', 'FORCED_OFF'], qualname = "AdvancedJITLoad.Events")
     color_map = {'ON' : 'green',
                  'SAVE' : 'blue',
                  'RESTORE' : 'lightblue',
@@ -30,10 +31,8 @@ class AdvancedJITLoad:
         self.time_base = time_base
         self.log_full = config['log'] if 'log' in config else True
             
-        thresholds = [("RESTORE", config['v_restore'], "rising"),
-                      ("SAVE", config['v_save'], "falling"),
-                      ("OFF", config['v_min'], "falling")] #todo: make it work that both rising and falling edge of this voltage trigger a simulation round
-        self.voltage_monitor = VoltageMonitor(thresholds)
+        self.v_restore = config['v_restore']
+        self.v_save = config['v_save']
         self.v_min = config['v_min']
                 
         self.currents = dict()
@@ -55,7 +54,11 @@ class AdvancedJITLoad:
         self.old_board_voltage = initial_voltage
         self.old_cap_voltage = initial_cap_voltage
         
-        self.voltage_monitor.reset()
+        #thresholds are created on reset, such that changed parameters (e.g., by a trade-off exploration) are applied
+        thresholds = [("RESTORE", self.v_restore, "rising"),
+                      ("SAVE", self.v_save, "falling"),
+                      ("OFF", self.v_min, "falling")] #todo: make it work that both rising and falling edge of this voltage trigger a simulation round
+        self.voltage_monitor = VoltageMonitor(thresholds)
         self.application.reset()
         
         self.t_restore_s = int(self.t_restore / self.time_base)
@@ -69,12 +72,13 @@ class AdvancedJITLoad:
             self.off_start_time = 0
         
         self.log_processed = False
-        self.log = [{'time' : 0, 
-                     'event' : self.Events.NONE.name, 
-                     'i_out' : self.get_current(initial_voltage), 
-                     'state' : self.state.name,
-                     'v_out' : initial_voltage,
-                     'v_cap' : initial_cap_voltage}]
+        self.log = LogRecorder()
+        self.log.append({'time' : 0, 
+                        'event' : self.Events.NONE.name, 
+                        'i_out' : self.get_current(initial_voltage), 
+                        'state' : self.state.name,
+                        'v_out' : initial_voltage,
+                        'v_cap' : initial_cap_voltage})
         
         self.stats = {'time_ON' : 0,
                       'time_OFF' : 0,
@@ -105,6 +109,9 @@ class AdvancedJITLoad:
         else:
             return self.currents[self.state]
 
+    def is_piecewise_constant(self):
+        return True #current only changes on state changes
+    
     def get_next_change(self, time): #
         if self.state == self.States.ON:  # if we are on, the appl. gives the next update event
             next_update = self.application.get_next_change(time)[1]
@@ -247,14 +254,19 @@ class AdvancedJITLoad:
     
     def process_log(self, time_max):
         if self.log_full:
-            self.log = pd.DataFrame(self.log)
+            self.log = self.log.to_dataframe()
             self.log.loc[:, 'dt'] = abs(self.log.time.diff(-1))
             self.log.loc[self.log.index[-1], 'dt'] = time_max*self.time_base - self.log.time.iloc[-1]
             self.log.loc[:,'p_out'] = self.log.i_out * (self.log.v_out.shift(-1) + self.log.v_out)/2 #interpolate/estimate power consumption between two different voltage points
+        else:
+            self.log = self.log.to_dataframe() #only the initial state was logged
         self.log_processed = True
         self.application.process_log(time_max)
         
     def get_log(self):      
+        if not self.log_processed:
+            self.process_log(0)
+        
         return self.log
     
     def get_log_stats(self):    
@@ -329,10 +341,10 @@ class AdvancedJITLoad:
             pass
         
         def reset(self):
-            self.log = [] #TODO: convert to numpy tuple (faster)
+            self.log = LogRecorder()
         
         def get_log(self):
-            return pd.DataFrame(self.log) #todo: check and remove, as data also accesible from Load log (total_time = time in state Active)
+            return self.log.to_dataframe() #todo: check and remove, as data also accesible from Load log (total_time = time in state Active)
         
         def process_log(self, time_max):
             pass
@@ -351,7 +363,7 @@ class AdvancedJITLoad:
             
         def reset(self):
             self.next_update = None
-            self.log = [] #TODO: convert to numpy tuple (faster)
+            self.log = LogRecorder()
             self.log_processed = False
             self.stats = {'num_tasks_successful' : 0,
                           'num_tasks_failed' : 0}
@@ -390,13 +402,17 @@ class AdvancedJITLoad:
         
         def process_log(self, time_max):
             if self.log_full:
-                self.log = pd.DataFrame(self.log)
+                self.log = self.log.to_dataframe()
                 self.log.loc[self.log.index[-1], "end"] = time_max * self.time_base
                 self.log['dt'] = self.log.end - self.log.start
             else:
                 self.log = pd.DataFrame()
+            self.log_processed = True
               
         def get_log(self):
+            if not self.log_processed:
+                self.process_log(0)
+            
             return self.log
         
         def get_stats(self):
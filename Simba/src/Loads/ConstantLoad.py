@@ -10,10 +10,11 @@ The `ConstantLoad` module represents a load that draws a constant current.
 from VoltageMonitor import VoltageMonitor
 from aenum import Enum
 import pandas as pd
+from Recorder import LogRecorder
 
 class ConstantLoad:
     
-    States = Enum("State", ['OFF', 'ON'])
+    States = Enum("State", ['OFF', 'ON'], qualname = "ConstantLoad.States") #qualname required for pickling
     
     def __init__(self, config, verbose, time_base):
         self.current = config['current']
@@ -27,10 +28,11 @@ class ConstantLoad:
         self.update_time = None
         
         self.log_processed = False
-        self.log = [{'time' : 0, 
-                     'i_out' : self.get_current(0), 
-                     'state' : self.state.name,
-                     'v_out' : initial_voltage}]
+        self.log = LogRecorder()
+        self.log.append({'time' : 0, 
+                        'i_out' : self.get_current(0), 
+                        'state' : self.state.name,
+                        'v_out' : initial_voltage})
 
     def get_state(self):
         return self.state
@@ -44,6 +46,9 @@ class ConstantLoad:
         
         return self.current
 
+    def is_piecewise_constant(self):
+        return True #current only changes on state changes
+    
     def get_next_change(self, time):
         return None
 
@@ -56,10 +61,12 @@ class ConstantLoad:
     
     def process_log(self, time_max):
         if self.log_full:
-            self.log = pd.DataFrame(self.log)
+            self.log = self.log.to_dataframe()
             self.log.loc[:, 'dt'] = abs(self.log.time.diff(-1))
             self.log.loc[self.log.index[-1],'dt'] = time_max*self.time_base - self.log.time.iloc[-1]
             self.log.loc[:,'p_out'] = self.log.i_out * (self.log.v_out.shift(-1) + self.log.v_out)/2 #interpolate/estimate power consumption between two different voltage points
+        else:
+            self.log = self.log.to_dataframe() #only the initial state was logged
         self.log_processed = True
     
     def get_log(self):  
@@ -17,11 +17,13 @@ In between, while *computing*, the device consumes a configurable constant curre
 from aenum import Enum
 import pandas as pd
 from VoltageMonitor import VoltageMonitor
+from Recorder import LogRecorder
                    
 class JITLoad:
     
-    States = Enum("State", ['OFF', 'RESTORE', 'COMPUTE', 'CHECKPOINT'])
-    Events = Enum("Events", ['NONE', 'RESTORE_START', 'RESTORE_SUCCESS', 'RESTORE_FAIL', 'CHECKPOINT_START', 'CHECKPOINT_FAIL', 'CHECKPOINT_SUCCESS', 'COMPUTE_START', 'TURN_OFF'])
+    States = Enum("State", ['OFF', 'RESTORE', 'COMPUTE', 'CHECKPOINT'], qualname = "JITLoad.States") #qualname required for pickling
+    Events = Enum("Events", ['NONE', 'RESTORE_START', 'RESTORE_SUCCESS', 'RESTORE_FAIL', 'CHECKPOINT_START', 'CHECKPOINT_FAIL', 'CHECKPOINT_SUCCESS', 'COMPUTE_START', 'TURN_OFF'], qualname = "JITLoad.Events")
+    late_params = {'v_checkpoint' : 'falling'} #parameters without effect until the capacitor voltage first crosses them (see run_tradeoff_exploration)
      
     def __init__(self, config, verbose, time_base):
         
@@ -73,13 +75,14 @@ class JITLoad:
             self.voltage_monitor.unregister_event('CHECKPOINTS_START')
                                 
         self.log_processed = False
-        self.log = [{'time' : 0, 
-                     'event' : self.Events.NONE.name, 
-                     'i_out' : self.get_current(initial_voltage), 
-                     'state' : self.state.name,
-                     'v_out' : initial_voltage,
-                     'v_cap' : initial_cap_voltage,
-                     'valid_checkpoint' : False}]
+        self.log = LogRecorder()
+        self.log.append({'time' : 0, 
+                        'event' : self.Events.NONE.name, 
+                        'i_out' : self.get_current(initial_voltage), 
+                        'state' : self.state.name,
+                        'v_out' : initial_voltage,
+                        'v_cap' : initial_cap_voltage,
+                        'valid_checkpoint' : False})
         
         self.stats = {'time_OFF' : 0,
                       'time_RESTORE' : 0,
@@ -94,6 +97,12 @@ class JITLoad:
                       'num_RESTORE_successful' : 0,
                       'num_RESTORE_failed' : 0}
         
+    #apply changed thresholds while the simulation is running (e.g., when forking a simulation with different late_params)
+    def update_thresholds(self):
+        if self.voltage_monitor.is_registered('CHECKPOINTS_START'):
+            self.voltage_monitor.unregister_event('CHECKPOINTS_START')
+            self.voltage_monitor.register_event('CHECKPOINTS_START', self.v_checkpoint, 'falling')
+        
     def create_thresholds(self):
         thresholds = [("OFF", self.v_off, "falling"),
                       ("CHECKPOINTS_START", self.v_checkpoint, "falling"),
@@ -114,6 +123,9 @@ class JITLoad:
 
         return self.currents[self.state]
 
+    def is_piecewise_constant(self):
+        return True #current only changes on state changes
+    
     def get_next_change(self, time): #
         next_update = self.next_update[1]
         return None if next_update == None else next_update - time
@@ -242,7 +254,7 @@ class JITLoad:
     
     def process_log(self, time_max):
         if self.log_full:
-            self.log = pd.DataFrame(self.log)
+            self.log = self.log.to_dataframe()
             self.log.loc[:, 'dt'] = abs(self.log.time.diff(-1))
             self.log.loc[self.log.index[-1], 'dt'] = time_max * self.time_base - self.log.time.iloc[-1]
             self.log.loc[:,'p_out'] = self.log.i_out * (self.log.v_out.shift(-1) + self.log.v_out)/2 #interpolate/estimate power consumption between two different voltage points
@@ -251,6 +263,9 @@ class JITLoad:
         self.log_processed = True
         
     def get_log(self):      
+        if not self.log_processed:
+            self.process_log(0)
+        
         return self.log
     
     def get_log_stats(self, normalize = True):      
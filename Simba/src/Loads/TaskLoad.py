@@ -12,11 +12,12 @@ The load further has a minimum operating voltage that is implemented as a hyster
 from aenum import Enum, extend_enum
 import pandas as pd
 from VoltageMonitor import VoltageMonitor
+from Recorder import LogRecorder
                    
 class TaskLoad:
     
-    States = Enum("State", ['OFF'])
-    Events = Enum("Events", ['NONE', 'ON', 'OFF'])
+    States = Enum("State", ['OFF'], qualname = "TaskLoad.States") #qualname required for pickling
+    Events = Enum("Events", ['NONE', 'ON', 'OFF'], qualname = "TaskLoad.Events")
     
     def __init__(self, config, verbose, time_base):
         self.verbose = verbose
@@ -30,9 +31,6 @@ class TaskLoad:
 
         self.v_on = config['v_on']
         self.v_off = config['v_off']
-        thresholds = [("ON", config['v_on'], "rising"),
-                      ("OFF", config['v_off'], "falling")]
-        self.voltage_monitor = VoltageMonitor(thresholds)
                 
         self.register_tasks(config['tasks'])
         self.start_task = config['skip_initial_task'] if 'skip_initial_task' in config else 0
@@ -60,7 +58,10 @@ class TaskLoad:
         self.old_voltage = initial_voltage
         self.current_task = 0 #we start with first task
         
-        self.voltage_monitor.reset()
+        #thresholds are created on reset, such that changed parameters (e.g., by a trade-off exploration) are applied
+        thresholds = [("ON", self.v_on, "rising"),
+                      ("OFF", self.v_off, "falling")]
+        self.voltage_monitor = VoltageMonitor(thresholds)
         if self.state == self.States.OFF:
             self.voltage_monitor.unregister_event('OFF')
             self.next_update = (self.Events.NONE, None)
@@ -69,13 +70,14 @@ class TaskLoad:
             self.next_update = (self.Events[f'{self.state.name}_DONE'], int(self.tasks[self.current_task]['t'] / self.time_base))
         
         self.log_processed = False
-        self.log = [{'time' : 0, 
-                     'event' : self.Events.NONE.name, 
-                     'i_out' : self.get_current(initial_voltage), 
-                     'state' : self.state.name,
-                     'v_out' : initial_voltage,
-                     'v_cap' : initial_cap_voltage,
-                     'task_success' : False}]
+        self.log = LogRecorder()
+        self.log.append({'time' : 0, 
+                        'event' : self.Events.NONE.name, 
+                        'i_out' : self.get_current(initial_voltage), 
+                        'state' : self.state.name,
+                        'v_out' : initial_voltage,
+                        'v_cap' : initial_cap_voltage,
+                        'task_success' : False})
         
         #Init dict for statistics
         self.stats = {}
@@ -103,6 +105,9 @@ class TaskLoad:
         else:
             return self.tasks[self.current_task]['i']
 
+    def is_piecewise_constant(self):
+        return True #current only changes on state changes
+    
     def get_next_change(self, time): #
         return None if self.next_update[1] == None else self.next_update[1] - time
                 
@@ -225,7 +230,7 @@ class TaskLoad:
         return load_event
         
     def process_log(self, time_max):        
-        self.log = pd.DataFrame(self.log)
+        self.log = self.log.to_dataframe()
         self.log.loc[:, 'dt'] = abs(self.log.time.diff(-1))
         self.log.loc[self.log.index[-1],'dt'] = time_max * self.time_base - self.log.time.iloc[-1]
         self.log.loc[:,'p_out'] = self.log.i_out * (self.log.v_out.shift(-1) + self.log.v_out)/2 #interpolate/estimate power consumption between two different voltage points
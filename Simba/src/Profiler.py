@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Helper class: Profiler
+
+Measures where the wall time of a simulation is spent. While active, the public methods of all modules (and their
+voltage monitors) as well as the scheduling and logging functions of the simulation core are replaced by timing
+wrappers on the instances, i.e., the simulation runs without any overhead if profiling is disabled.
+
+Each call is attributed to a phase of the simulation step: calls made directly by the simulation core are assigned
+by the called method (see `get_phase()`), nested calls (e.g., a converter's efficiency lookup within
+`update_state()`) inherit the phase of their caller.
+"""
+
+import time
+import functools
+import inspect
+import pandas as pd
+
+PHASES = ['input', 'output', 'scheduling', 'update', 'logging', 'other']
+
+#phase of a method that is directly called by the simulation core
+def get_phase(module, name):
+    if name == 'compute_next_update':
+        return 'scheduling'
+    elif name in ['log_data', 'get_state', 'process_log']:
+        return 'logging'
+    elif name in ['update_state', 'turn_off']:
+        return 'update'
+    elif module == 'harvester' or 'input' in name:
+        return 'input'
+    elif module == 'load' or 'output' in name or name == 'get_quiescent':
+        return 'output'
+    return 'other'
+
+#public methods of an instance (without nested classes such as the enums of states and events)
+def get_methods(obj):
+    return [name for name in dir(type(obj)) if not name.startswith('_') and inspect.ismethod(getattr(obj, name))]
+
+class Profiler:
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.active = False
+        self.methods = {} #(module, method, phase) -> [calls, total time, self time]
+        self.phases = dict.fromkeys(PHASES, 0)
+        self.stack = [] #[phase, time spent in nested calls] of the running calls
+        self.wrapped = [] #instances with wrapped methods
+        self.steps = 0
+        self.wall_time = 0
+        self.sim_time = 0
+
+    def __enter__(self):
+        self.active = True
+        self.start_time = self.sim.time
+        self.start = time.perf_counter()
+
+        self.wrap(self.sim, 'sim', ['compute_next_update', 'log_data'])
+        self.wrap(self.sim.voltage_monitor, 'sim.voltage_monitor', get_methods(self.sim.voltage_monitor))
+        for mod in ['cap', 'harvester', 'converter', 'load']:
+            module = getattr(self.sim, mod)
+            self.wrap(module, mod, get_methods(module))
+            if hasattr(module, 'voltage_monitor'):
+                self.wrap(module.voltage_monitor, f"{mod}.voltage_monitor", get_methods(module.voltage_monitor))
+        return self
+
+    def __exit__(self, *args):
+        for obj, names in self.wrapped:
+            for name in names:
+                del vars(obj)[name]
+        self.wrapped = []
+        self.active = False
+        self.wall_time += time.perf_counter() - self.start
+        self.sim_time += (self.sim.time - self.start_time) * self.sim.min_step_size
+        self.steps = self.methods.get(('sim', 'compute_next_update', 'scheduling'), [0])[0]
+
+    #replace the given methods of an instance by timing wrappers
+    def wrap(self, obj, module, names):
+        for name in names:
+            setattr(obj, name, self.timed(getattr(obj, name), module, name))
+        self.wrapped.append((obj, names))
+
+    def timed(self, method, module, name):
+        phase = get_phase(module, name)
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            self.stack.append([self.stack[-1][0] if self.stack else phase, 0])
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                call_phase, nested = self.stack.pop()
+                if self.stack:
+                    self.stack[-1][1] += elapsed
+                else:
+                    self.phases[call_phase] += elapsed
+                stats = self.methods.setdefault((module, name, call_phase), [0, 0, 0])
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += elapsed - nested
+        return wrapper
+
+    #time spent per method (total: including nested calls, self: excluding them), sorted by self time
+    def get_method_stats(self):
+        df = pd.DataFrame([[*key, *stats] for key, stats in self.methods.items()],
+                          columns = ['module', 'method', 'phase', 'calls', 'time_total', 'time_self'])
+        df['time_per_call_us'] = df.time_self / df.calls * 1e6
+        return df.sort_values('time_self', ascending = False, ignore_index = True)
+
+    #time spent per phase of the simulation step (core: remaining time within the simulation loop itself)
+    def get_phase_stats(self):
+        phases = dict(self.phases)
+        phases['core'] = self.wall_time - sum(self.phases.values())
+        df = pd.DataFrame({'time' : phases})
+        df['share'] = df.time / self.wall_time if self.wall_time > 0 else 0
+        return df
+
+    def get_summary(self):
+        return {'wall_time' : self.wall_time,
+                'sim_time' : self.sim_time,
+                'steps' : self.steps,
+                'steps_per_sim_second' : self.steps / self.sim_time if self.sim_time > 0 else None,
+                'phases' : self.get_phase_stats(),
+                'methods' : self.get_method_stats()}
+
+    def print_summary(self):
+        summary = self.get_summary()
+        print(f"Profile: {summary['wall_time']:.3f} s wall time for {summary['sim_time']:.3f} s simulated time, {summary['steps']} steps "
+              f"({summary['steps_per_sim_second'] if summary['steps_per_sim_second'] != None else 0:.1f} steps per simulated second).")
+        print(summary['phases'].to_string(float_format = lambda x: f"{x:.4f}"))
+        print(summary['methods'].to_string(float_format = lambda x: f"{x:.4f}"))
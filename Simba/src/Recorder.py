@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+Helper class: Log recorder
+
+Columnar replacement for the list-of-dicts logs of the simulation core and its modules.
+Rows are appended as dicts (`log.append({...})`) as before, but only the most recent rows (i.e., one chunk)
+are kept as dicts; full chunks are converted into NumPy columns, where columns with names or enums
+(e.g., states and events) are stored as categorical codes. The recorded data is only converted to a
+`pandas.DataFrame` on request.
+
+Single rows can still be read and modified (e.g., `log[-2]['valid_checkpoint'] = True`) as with the previous lists.
+
+Optionally, the recorder can stream its columns to disk (`stream(directory)`), i.e., each chunk is appended to
+a binary file per column (plus a JSON file with the column's metadata) and dropped from memory afterwards; chunks of
+object columns are appended to a pickle file per column instead.
+Streamed logs can be loaded again using `load_streamed_log(directory)`.
+"""
+
+import numbers
+from enum import Enum
+from bisect import bisect_right
+import numpy as np
+import pandas as pd
+from itertools import chain
+import os
+import json
+import pickle
+
+integer_types = {int, np.int32, np.int64}
+float_types = {float, np.float32, np.float64}
+bool_types = {bool, np.bool_}
+dtypes = {'float' : np.float64, 'bool' : np.int8, 'category' : np.int32} #storage type of each column kind (object columns are pickled)
+
+class LogColumn:
+
+    def __init__(self, value, path = None):
+        self.chunks = []
+        self.offsets = [] #index of the first row of each chunk
+        self.length = 0
+        self.integer = False
+        self.path = None #file the column is streamed to (if any)
+        self.size = 0 #bytes of the file that belong to the recorded rows
+
+        if isinstance(value, (bool, np.bool_)):
+            self.kind = 'bool' #stored as int8, -1 marks missing values
+        elif isinstance(value, numbers.Real):
+            self.kind = 'float' #integers are stored as floats (NaN marks missing values) and converted back on export
+            self.integer = True
+        elif isinstance(value, (str, Enum)):
+            self.kind = 'category' #stored as codes, -1 marks missing values
+            self.categories = []
+            self.codes = {None : -1}
+        else:
+            self.kind = 'object'
+
+        if path != None:
+            self.stream(path)
+
+    #add values (None marks missing values) of the rows starting at the given index
+    def extend(self, start, values):
+        if start > self.length: #column did not exist in previous rows
+            self.add_chunk(self.convert([None] * (start - self.length)))
+        try:
+            chunk = self.convert(values)
+        except (TypeError, ValueError): #values of different types are logged in the same column
+            self.to_object()
+            chunk = self.convert(values)
+        self.add_chunk(chunk)
+
+    def add_chunk(self, chunk):
+        if self.path != None:
+            with open(self.path, 'ab') as file:
+                if self.kind in dtypes:
+                    chunk.tofile(file)
+                else: #each chunk is a separate pickle, i.e., previous chunks are not written again
+                    pickle.dump(chunk, file)
+                self.size = file.tell()
+        else:
+            self.chunks.append(chunk)
+            self.offsets.append(self.length)
+        self.length += len(chunk)
+
+    #move the column to the given file, further chunks are directly appended to the file
+    def stream(self, path):
+        data = self.read()
+        self.chunks = []
+        self.offsets = []
+        if self.kind in dtypes:
+            self.path = path
+            data.astype(dtypes[self.kind]).tofile(self.path)
+        else: #objects cannot be stored in binary form
+            self.path = f"{os.path.splitext(path)[0]}.pkl"
+            with open(self.path, 'wb') as file:
+                pickle.dump(data, file)
+        self.size = os.path.getsize(self.path)
+
+    def convert(self, values):
+        types = set(map(type, values))
+        types.discard(type(None))
+        if self.kind == 'float':
+            if not types <= integer_types | float_types:
+                if not all(issubclass(t, numbers.Real) and not issubclass(t, (bool, np.bool_)) for t in types):
+                    raise TypeError("Not a number.")
+                self.integer = self.integer and all(issubclass(t, numbers.Integral) for t in types)
+            else:
+                self.integer = self.integer and types <= integer_types
+            return np.array(values, dtype = float)
+        elif self.kind == 'bool':
+            if not types <= bool_types:
+                raise TypeError("Not a boolean.")
+            return np.array([-1 if v is None else v for v in values], dtype = np.int8)
+        elif self.kind == 'category':
+            for value in set(values).difference(self.codes):
+                self.codes[value] = len(self.categories)
+                self.categories.append(value)
+            return np.fromiter(map(self.codes.__getitem__, values), dtype = np.int32, count = len(values))
+        else:
+            chunk = np.empty(len(values), dtype = object)
+            chunk[:] = [np.nan if v is None else v for v in values]
+            return chunk
+
+    def decode(self, value):
+        if self.kind == 'bool':
+            return None if value < 0 else bool(value)
+        elif self.kind == 'category':
+            return None if value < 0 else self.categories[value]
+        elif self.kind == 'float':
+            if np.isnan(value):
+                return None
+            return int(value) if self.integer else float(value)
+        return None if (isinstance(value, float) and np.isnan(value)) else value
+
+    #return the stored values (memory-mapped if the column is streamed to a file)
+    def read(self, mode = 'r', start = 0, length = None):
+        length = self.length - start if length == None else length
+        if self.path != None and self.kind not in dtypes:
+            return read_pickled_chunks(self.path, self.size)[start : start + length]
+        if self.path != None:
+            if length == 0:
+                return np.empty(0, dtype = dtypes[self.kind])
+            return np.memmap(self.path, dtype = dtypes[self.kind], mode = mode, offset = start * np.dtype(dtypes[self.kind]).itemsize, shape = (length,))
+        if len(self.chunks) == 0:
+            return np.empty(0, dtype = dtypes[self.kind] if self.kind in dtypes else object)
+        chunk = bisect_right(self.offsets, start) - 1
+        if start + length <= self.offsets[chunk] + len(self.chunks[chunk]): #no copy necessary
+            return self.chunks[chunk][start - self.offsets[chunk] : start - self.offsets[chunk] + length]
+        return np.concatenate(self.chunks)[start : start + length]
+
+    def get(self, idx):
+        if idx >= self.length:
+            return None
+        return self.decode(self.read(start = idx, length = 1)[0])
+
+    def set(self, idx, value):
+        if idx >= self.length:
+            self.extend(self.length, [None] * (idx + 1 - self.length))
+        try:
+            value = self.convert([value])[0]
+        except (TypeError, ValueError):
+            self.to_object()
+            value = self.convert([value])[0]
+        if self.path != None and self.kind not in dtypes: #the file is only appended to, the new value is applied when reading
+            with open(self.path, 'ab') as file:
+                pickle.dump((idx, value), file)
+                self.size = file.tell()
+            return
+        data = self.read(mode = 'r+', start = idx, length = 1)
+        data[0] = value
+        if self.path != None:
+            data.flush()
+
+    #fallback if values of different types are logged in the same column
+    def to_object(self):
+        values = [self.decode(value) for value in self.read()]
+        path = self.path
+        if path != None:
+            os.remove(path)
+        self.kind = 'object'
+        self.integer = False
+        self.path = None
+        self.chunks = []
+        self.offsets = []
+        self.length = 0
+        self.add_chunk(self.convert(values))
+        if path != None:
+            self.stream(path)
+
+    #discard data in the file beyond the recorded rows
+    def truncate(self):
+        if self.path != None:
+            os.truncate(self.path, self.size if self.kind not in dtypes else self.length * np.dtype(dtypes[self.kind]).itemsize)
+
+    def get_metadata(self):
+        categories = [c.name if isinstance(c, Enum) else c for c in self.categories] if self.kind == 'category' else None
+        return {'kind' : self.kind, 'integer' : self.integer, 'length' : self.length, 'categories' : categories,
+                'file' : os.path.basename(self.path) if self.path != None else None}
+
+    def to_array(self, length):
+        if self.length < length:
+            self.extend(self.length, [None] * (length - self.length))
+        return decode_column(self.kind, self.integer, self.categories if self.kind == 'category' else None, self.read(mode = 'c')) #changes to the DataFrame are not written back
+
+#read the chunks pickled one after the other (up to the given size in bytes) as one array; (index, value) pairs
+#between the chunks are values of rows that were modified after they were streamed
+def read_pickled_chunks(path, size = None):
+    chunks = []
+    changes = []
+    with open(path, 'rb') as file:
+        while size == None or file.tell() < size:
+            try:
+                record = pickle.load(file)
+            except EOFError:
+                break
+            if isinstance(record, tuple):
+                changes.append(record)
+            else:
+                chunks.append(record)
+    values = np.concatenate(chunks) if len(chunks) > 0 else np.empty(0, dtype = object)
+    for idx, value in changes:
+        values[idx] = value
+    return values
+
+#convert stored values to the values of a DataFrame column
+def decode_column(kind, integer, categories, data):
+    data = np.asarray(data) #memory-mapped columns are passed on as plain arrays
+    if kind == 'bool':
+        if (data < 0).any():
+            values = np.empty(len(data), dtype = object)
+            values[:] = [np.nan if v < 0 else bool(v) for v in data]
+            return values
+        return data.view(np.bool_)
+    elif kind == 'category':
+        return pd.Categorical.from_codes(data, categories = pd.Index(categories, dtype = object))
+    elif kind == 'float' and integer and not np.isnan(data).any():
+        return data.astype(np.int64)
+    return data
+
+
+class LogRow:
+
+    def __init__(self, recorder, idx):
+        self.recorder = recorder
+        self.idx = idx
+
+    def __getitem__(self, key):
+        if key not in self.recorder.columns:
+            raise KeyError(key)
+        return self.recorder.columns[key].get(self.idx)
+
+    def __setitem__(self, key, value):
+        if key not in self.recorder.columns:
+            self.recorder.columns[key] = LogColumn(value, self.recorder.get_column_path(key))
+        self.recorder.columns[key].set(self.idx, value)
+
+
+class LogRecorder:
+
+    def __init__(self, chunk_size = 4096):
+        self.chunk_size = chunk_size
+        self.columns = {}
+        self.rows = [] #most recent rows, not yet converted to columns
+        self.length = 0 #number of rows stored in columns
+        self.path = None #directory the columns are streamed to (if any)
+
+    def __len__(self):
+        return self.length + len(self.rows)
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError("Log index out of range.")
+        if idx >= self.length:
+            return self.rows[idx - self.length]
+        return LogRow(self, idx)
+
+    def append(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    #stream all (current and future) columns to the given directory
+    def stream(self, directory, chunk_size = None):
+        os.makedirs(directory, exist_ok = True)
+        for file in os.listdir(directory): #remove logs of previous runs
+            if file.endswith('.bin') or file.endswith('.pkl') or file == 'log.json':
+                os.remove(os.path.join(directory, file))
+
+        self.path = directory
+        self.chunk_size = chunk_size if chunk_size != None else self.chunk_size
+        for key, column in self.columns.items():
+            column.stream(self.get_column_path(key))
+        self.write_metadata()
+
+    def get_column_path(self, key):
+        return os.path.join(self.path, f"{key}.bin") if self.path != None else None
+
+    #convert the buffered rows into columns
+    def flush(self):
+        if len(self.rows) == 0:
+            return
+        keys = dict.fromkeys(chain.from_iterable(self.rows)) #keep order of appearance
+        for key in keys:
+            values = [row.get(key) for row in self.rows]
+            if key not in self.columns:
+                self.columns[key] = LogColumn(next(v for v in values if v is not None) if any(v is not None for v in values) else None, self.get_column_path(key))
+            self.columns[key].extend(self.length, values)
+        self.length += len(self.rows)
+        self.rows = []
+
+        if self.path != None:
+            self.write_metadata()
+
+    #add (derived) columns of a processed log, e.g., to store them along with the streamed columns
+    def add_columns(self, df):
+        self.flush()
+        for key in df.columns:
+            if key not in self.columns and len(df) == self.length:
+                values = df[key].to_numpy()
+                column = LogColumn(next((v for v in values if v is not None), None))
+                if column.kind == 'float' and values.dtype.kind in 'iuf':
+                    column.integer = values.dtype.kind in 'iu'
+                    column.add_chunk(values.astype(float))
+                else:
+                    column.extend(0, list(values))
+                if self.path != None:
+                    column.stream(self.get_column_path(key))
+                self.columns[key] = column
+        if self.path != None:
+            self.write_metadata()
+
+    #discard streamed data beyond the recorded rows (e.g., after restoring a snapshot of the simulation)
+    def truncate(self):
+        if self.path == None:
+            return
+        for column in self.columns.values():
+            column.truncate()
+        self.write_metadata()
+
+    def write_metadata(self):
+        metadata = {'length' : self.length, 'columns' : {}}
+        for key, column in self.columns.items():
+            metadata['columns'][key] = column.get_metadata()
+
+        with open(os.path.join(self.path, 'log.json'), 'w') as file:
+            json.dump(metadata, file)
+
+    def to_dataframe(self):
+        self.flush()
+        if self.length == 0:
+            return pd.DataFrame()
+        return pd.DataFrame({key : column.to_array(self.length) for key, column in self.columns.items()}, copy = False)
+
+#load a log that was streamed to the given directory (columns are memory-mapped, enums are restored as their names)
+def load_streamed_log(directory):
+    with open(os.path.join(directory, 'log.json'), 'r') as file:
+        metadata = json.load(file)
+
+    data = {}
+    for key, column in metadata['columns'].items():
+        path = os.path.join(directory, column['file'])
+        if column['kind'] in dtypes:
+            values = np.memmap(path, dtype = dtypes[column['kind']], mode = 'c', shape = (column['length'],)) if column['length'] > 0 else np.empty(0, dtype = dtypes[column['kind']])
+        else:
+            values = read_pickled_chunks(path)[:column['length']]
+        if column['length'] < metadata['length']: #column was not logged in the last rows
+            missing = {'float' : np.nan, 'bool' : -1, 'category' : -1}[column['kind']] if column['kind'] in dtypes else np.nan
+            values = np.concatenate([values, np.full(metadata['length'] - column['length'], missing, dtype = values.dtype)])
+        data[key] = decode_column(column['kind'], column['integer'], column['categories'], values[:metadata['length']])
+
+    return pd.DataFrame(data, copy = False)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Helper class: Result cache
+
+Content-addressed cache of the results of experiments (see `run_experiment()`) on disk. Each result is stored in
+`<directory>/<key>.pkl`, where the key is a hash of everything that determines the result (i.e., the base
+configuration, the changed parameters, simulated time, simulation settings, requested metrics, and the versions of all
+source files of Simba as well as of the used module implementations). Changing any of them results in a new key, such
+that outdated results are never returned (but remain stored until they are invalidated).
+"""
+
+import os
+import re
+import json
+import time
+import pickle
+import hashlib
+import importlib.util
+import pandas as pd
+
+versions = {} #(file path, mtime) -> hash of the file
+source_files = None #source files of Simba (relative paths), collected once per process
+
+#version of a source file (hash of its content)
+def get_file_version(file_path):
+    key = (file_path, os.stat(file_path).st_mtime_ns)
+    if key not in versions:
+        with open(file_path, 'rb') as file:
+            versions[key] = hashlib.sha256(file.read()).hexdigest()[:16]
+    return versions[key]
+
+#all source files of Simba (i.e., the simulation core, helpers, and module implementations), as any of them can affect the results
+def get_source_files(directory):
+    global source_files
+    if source_files == None:
+        source_files = sorted(os.path.relpath(os.path.join(path, name), directory) for path, _, names in os.walk(directory) 
+                              if '__pycache__' not in path for name in names if name.endswith('.py'))
+    return source_files
+
+#versions of all source files of Simba and of the given module implementations (e.g., 'Harvesters.SolarPanel', in case they are located elsewhere)
+def get_versions(packages):
+    directory = os.path.dirname(os.path.abspath(__file__))
+    result = {name : get_file_version(os.path.join(directory, name)) for name in get_source_files(directory)}
+    for package in packages:
+        spec = importlib.util.find_spec(package)
+        result[package] = get_file_version(spec.origin) if spec != None and spec.origin != None else None
+    return result
+
+#check whether the repr of a value is the same in every process (e.g., not for functions and lambdas, whose repr contains their address)
+def has_stable_repr(value):
+    return re.search(r" at 0x[0-9a-fA-F]+", repr(value)) == None
+
+#stable hash of a description (JSON-serializable apart from values such as NumPy numbers, which are given by their repr)
+def get_key(description):
+    return hashlib.sha256(json.dumps(description, sort_keys = True, default = repr).encode()).hexdigest()
+
+class ResultCache:
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok = True)
+
+    def get_path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def contains(self, key):
+        return os.path.isfile(self.get_path(key))
+
+    #cached entry of the given key (None if not cached)
+    def get(self, key):
+        try:
+            with open(self.get_path(key), 'rb') as file:
+                return pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    #cached result of the given key (None if not cached)
+    def get_result(self, key):
+        entry = self.get(key)
+        return entry['result'] if entry != None else None
+
+    def put(self, key, result, params = {}, info = {}):
+        entry = {'key' : key, 'created' : time.time(), 'params' : params, 'info' : info, 'result' : result}
+        with open(f"{self.get_path(key)}.tmp", 'wb') as file: #concurrent readers only see complete entries
+            pickle.dump(entry, file)
+        os.replace(f"{self.get_path(key)}.tmp", self.get_path(key))
+
+    def get_keys(self):
+        return [name[:-4] for name in os.listdir(self.directory) if name.endswith('.pkl')]
+
+    #overview of all cached entries (one row per entry, with its changed parameters as columns)
+    def inspect(self):
+        rows = []
+        for key in self.get_keys():
+            entry = self.get(key)
+            if entry == None:
+                continue
+            rows.append({'key' : key, 'created' : pd.Timestamp(entry['created'], unit = 's'), **entry['info'], **entry['params']})
+        return pd.DataFrame(rows)
+
+    #remove the entries with the given keys and/or whose parameters match all given values (e.g., {'cap.capacitance' : 1e-3}),
+    #or all entries if neither is given; returns the number of removed entries
+    def invalidate(self, keys = None, params = None):
+        removed = 0
+        for key in self.get_keys() if keys == None else keys:
+            if params != None:
+                entry = self.get(key)
+                if entry == None or any(k not in entry['params'] or entry['params'][k] != v for k, v in params.items()):
+                    continue
+            try:
+                os.remove(self.get_path(key))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def clear(self):
+        return self.invalidate()
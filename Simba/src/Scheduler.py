@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Helper class: Scheduler
+
+Event queue of the simulation core. Each source (e.g., a module's timer or a voltage threshold) has at most one
+pending event, which it can reschedule or cancel at any time. Events are stored in a heap; rescheduled or
+cancelled events are not removed from the heap, but skipped once they reach the top (lazy cancellation). The time of
+the next event is cached, i.e., the heap is only touched in steps in which some source was rescheduled or cancelled.
+"""
+
+import heapq
+
+class Scheduler:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.heap = []
+        self.events = {} #time of the pending event of each source
+        self.next_time = None
+        self.changed = False #next_time has to be recomputed
+
+    #schedule the next event of the given source (replaces its pending event; None cancels it)
+    def schedule(self, source, time):
+        if time == None:
+            self.cancel(source)
+            return
+        if self.events.get(source) == time:
+            return
+        self.events[source] = time
+        heapq.heappush(self.heap, (time, source))
+        self.changed = True
+
+        if len(self.heap) > 4 * len(self.events) + 16: #too many cancelled events, rebuild heap
+            self.heap = [(t, s) for s, t in self.events.items()]
+            heapq.heapify(self.heap)
+
+    def cancel(self, source):
+        if self.events.pop(source, None) != None:
+            self.changed = True
+
+    def get_time(self, source):
+        return self.events.get(source)
+
+    #time of the next pending event of any source
+    def get_next_time(self):
+        if not self.changed:
+            return self.next_time
+        self.changed = False
+        while len(self.heap) > 0 and self.events.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap) #skip cancelled events
+        self.next_time = self.heap[0][0] if len(self.heap) > 0 else None
+        return self.next_time
@@ -9,24 +9,49 @@ from matplotlib.patches import Patch
 import datetime
 import numpy as np
 import importlib
+import os
+import copy
+import pickle
+from VoltageMonitor import VoltageMonitor
+from Recorder import LogRecorder
+from Scheduler import Scheduler
+from Profiler import Profiler
 VERBOSE = False
 
 #%%
+# Process-local templates of created modules (only used in the workers of a TradeoffExplorer), such that traces and
+# lookup tables are only loaded once per worker and configuration
+module_templates = None
+MAX_MODULE_TEMPLATES = 32
+
+def create_module(package, config, time_base):
+    cls = getattr(importlib.import_module(f'{package}.{config["type"]}'), config['type'])
+    if module_templates == None:
+        return cls(config['settings'], VERBOSE, time_base)
+    
+    key = (package, repr(config), time_base)
+    if key not in module_templates:
+        if len(module_templates) >= MAX_MODULE_TEMPLATES:
+            module_templates.clear()
+        module_templates[key] = cls(config['settings'], VERBOSE, time_base)
+    return clone_module(module_templates[key])
+
+#copy of a module that shares the data loaded on creation (i.e., traces and lookup tables) with the original
+def clone_module(module):
+    memo = {id(value) : value for value in vars(module).values() if isinstance(value, (np.ndarray, pd.DataFrame))}
+    return copy.deepcopy(module, memo)
+
 def cap_factory(config, time_base):
-    cls = getattr(importlib.import_module(f'Capacitors.{config["type"]}'), config['type'])
-    return cls(config['settings'], VERBOSE, time_base)
+    return create_module('Capacitors', config, time_base)
 
 def converter_factory(config, time_base):
-     cls = getattr(importlib.import_module(f'Converters.{config["type"]}'), config['type'])
-     return cls(config['settings'], VERBOSE, time_base)
+    return create_module('Converters', config, time_base)
 
 def harvester_factory(config, time_base):
-     cls = getattr(importlib.import_module(f'Harvesters.{config["type"]}'), config['type'])
-     return cls(config['settings'], VERBOSE, time_base)
+    return create_module('Harvesters', config, time_base)
  
 def load_factory(config, time_base):
-     cls = getattr(importlib.import_module(f'Loads.{config["type"]}'), config['type'])
-     return cls(config['settings'], VERBOSE, time_base)
+    return create_module('Loads', config, time_base)
 
 class Simulation:
 
@@ -34,18 +59,36 @@ class Simulation:
         
         self.min_step_size = 1e-6 #us as timing base
         self.max_step_size = 1e-3 #at least every xxx s
+        self.fast_forward = False #jump directly to the next event while all modules draw piecewise-constant currents
+        self.tolerance = None #maximum (estimated) error of the capacitor voltage per step (V); adapts the step size between min_step_size and max_step_size
+        self.log_stream_path = None #stream the logs to this directory while simulating (keeps memory bounded for long simulations)
+        self.checkpoint_path = None #periodically store a snapshot of the simulation to this file (see save_snapshot())
+        self.checkpoint_interval = 3600 #simulated time between two checkpoints (s)
+        self.profile = False #measure the time spent per module method and phase of the simulation step, print a summary after each run
+        self.profiler = None
+        self.stop_conditions = [] #end the simulation as soon as any of these conditions (condition(sim)) returns True, see StopConditions.py
         
         self.cap = cap_factory(cap_config, self.min_step_size)
         self.load = load_factory(load_config, self.min_step_size)
         self.harvester = harvester_factory(harvester_config, self.min_step_size)
         self.converter = converter_factory(converter_config, self.min_step_size)
         
+        # Data loaded on construction (e.g., traces, lookup tables) does not change during the simulation and is not part of a snapshot
+        self.static_data = {mod : [key for key, value in vars(getattr(self, mod)).items() if isinstance(value, (np.ndarray, pd.DataFrame))]
+                            for mod in ['cap', 'load', 'harvester', 'converter']}
+        
         self.log_keys = log_keys
         self.log_trigger = log_triggers
         self.force_log = log_keys != [] and log_triggers == []
                 
     def reset(self, time_end):
         self.sim_end = int(time_end / self.min_step_size)
+        self.time = 0
+        self.num_steps = 0
+        self.truncated = False #ended by a stop condition
+        self.stopped_by = None
+        self.time_skipped = 0 #simulated time skipped due to a stop condition (s)
+        self.next_checkpoint = int(self.checkpoint_interval / self.min_step_size)
         self.max_step = int(self.max_step_size / self.min_step_size)
         
         self.cap.reset() 
@@ -54,21 +97,68 @@ class Simulation:
         harvester_ocv = self.harvester.get_ocv(0)
         self.harvester.reset(self.converter.get_input_operating_voltage(self.cap.voltage, harvester_ocv, 0))
         
-        self.log = []
+        self.log = LogRecorder()
         self.log_processed = False
+        if self.log_stream_path != None:
+            self.stream_logs(self.log_stream_path)
         
         self.load_event = 0
         self.cap_event = 0
+        
+        # Pending updates of the modules (i.e., timers and threshold crossings), only recomputed if they might have changed
+        self.scheduler = Scheduler()
+        self.timers = {}
+        self.crossings = {}
+        
+        self.adaptive_step = self.max_step
+        self.i_step = None
+        
+        # Voltage limits that are not registered by the modules themselves, but have to be hit exactly when fast-forwarding
+        self.v_ov = min(getattr(module, 'v_ov', np.inf) for module in [self.converter, self.harvester])
+        limits = [("EMPTY", 0, "falling")]
+        if self.v_ov < np.inf:
+            limits.append(("OVERVOLTAGE", self.v_ov, "rising"))
+        self.voltage_monitor = VoltageMonitor(limits)
+                                
+    #stream the logs of the simulation core and all modules to (separate subdirectories of) the given directory
+    def stream_logs(self, path):
+        self.log_recorders = {}
+        for mod in ['cap', 'load', 'harvester', 'converter']:
+            log = getattr(getattr(self, mod), 'log', None)
+            if isinstance(log, LogRecorder) and getattr(getattr(self, mod), 'log_full', True):
+                log.stream(os.path.join(path, mod))
+                self.log_recorders[mod] = log
+            elif os.path.isfile(os.path.join(path, mod, 'log.json')): #remove log of a previous run
+                os.remove(os.path.join(path, mod, 'log.json'))
+        self.log.stream(os.path.join(path, 'sim'))
                                 
-    def run(self, until = 10):
+    #simulate until the given time (s); if stop conditions are given, the simulation ends as soon as one of them holds
+    def run(self, until = 10, stop = None, stop_conditions = None):
+        if stop_conditions != None:
+            self.stop_conditions = stop_conditions
         self.reset(until)
         assert until <= self.harvester.time_max * self.min_step_size, "Cannot start simulation: Simulation time exceeds harvesting trace."
+        self.execute(stop)
+
+    #continue a simulation from a snapshot stored with save_snapshot() (the simulation has to be created with the same configuration)
+    def resume(self, file_path):
+        self.load_snapshot(file_path)
         self.execute()
 
-    def execute(self):   
-        self.time = 0
+    #simulate until the end of the simulation, or pause before the step in which stop(sim) returns True (continue with execute())
+    def execute(self, stop = None):   
+        if self.profile and (self.profiler == None or not self.profiler.active):
+            with Profiler(self) as self.profiler:
+                self.execute(stop)
+            self.profiler.print_summary()
+            return
+        
         start = datetime.datetime.now()
-        while self.time < self.sim_end:
+        while self.time < self.sim_end and not self.truncated:
+            
+            if self.checkpoint_path != None and self.time >= self.next_checkpoint:
+                self.save_snapshot(self.checkpoint_path)
+                self.next_checkpoint = self.time + int(self.checkpoint_interval / self.min_step_size)
             
             # Store certain variables locally for logging 
             self.v_cap = self.cap.voltage
@@ -93,20 +183,41 @@ class Simulation:
             self.i_total = self.i_in * v_in_adjust * self.efficiency_in - self.i_out * v_out_adjust / self.efficiency_out - self.i_leak_converter   
  
             # Compute when we have to update our simulation the next time
+            self.piecewise_constant = self.fast_forward and self.is_piecewise_constant()
             self.dt = self.compute_next_update(self.i_total)
             next_time = self.dt + self.time
+            if self.tolerance != None and not self.piecewise_constant: #adaptive step, charge the capacitor with the current at its midpoint
+                self.i_total = self.i_step
+            
+            if stop != None and stop(self):
+                return
    
             self.log_data(self.time, self.force_log)
             #print(f"{self.time} : dt = {self.dt}; i_in = {self.i_in}, i_out = {self.i_out}, i_total = {self.i_total}, vcap = {self.cap.voltage}, state = {self.load.state.name}")
              
             # update and log
-            self.harvester.update_state(next_time, self.dt, self.v_in) 
             self.cap.update_state(self.time, self.dt, self.i_total) 
+            if self.piecewise_constant: #voltages change linearly within the interval, account harvested energy at the mean input voltage
+                v_in = (self.v_in + self.converter.get_input_operating_voltage(self.cap.voltage, self.harvester_ocv, next_time)) / 2
+            else:
+                v_in = self.v_in
+            self.harvester.update_state(next_time, self.dt, v_in) 
             self.converter.update_state(next_time, self.dt, self.cap.voltage) #might be necessary for bq255xx etc.
             if self.load.update_state(next_time, self.dt, self.converter.get_output_operating_voltage(self.cap.voltage), self.cap.voltage) == 'FORCE_OFF':
                 self.converter.turn_off(self.cap.voltage) #if load asks for a 'self-shutoff', the converter has to serve this
                 
             self.time = next_time       
+            self.num_steps += 1
+            
+            # End the simulation once its outcome is decided
+            for condition in self.stop_conditions:
+                if condition(self):
+                    self.truncated = True
+                    self.stopped_by = repr(condition)
+                    self.time_skipped = (self.sim_end - self.time) * self.min_step_size
+                    if VERBOSE:
+                        print(f"Simulation stopped at {self.time * self.min_step_size:.6f} s ({self.stopped_by}), skipped {self.time_skipped:.6f} s.")
+                    break
                 
         if VERBOSE:
             print(f"Total elapsed time for simulation: {datetime.datetime.now() - start}.")
@@ -118,19 +229,152 @@ class Simulation:
         self.harvester.process_log(self.time)
        
         
+    #capture the complete state of the simulation core and all modules (including their logs) at the current point in time
+    def snapshot(self):
+        state = {key : value for key, value in vars(self).items() if key not in ['cap', 'load', 'harvester', 'converter', 'profiler'] and not hasattr(value, '__wrapped__')}
+        for mod in ['cap', 'load', 'harvester', 'converter']:
+            state[mod] = {key : value for key, value in vars(getattr(self, mod)).items() if key not in self.static_data[mod] and not hasattr(value, '__wrapped__')}
+        return copy.deepcopy(state, self.get_shared_memo())
+    
+    #memo for deepcopy that shares the data that does not change during a simulation (see static_data and the modules' shared_data) with the copy
+    def get_shared_memo(self):
+        memo = {}
+        for mod in ['cap', 'load', 'harvester', 'converter']:
+            module = getattr(self, mod)
+            for key in self.static_data[mod] + getattr(module, 'shared_data', []):
+                if hasattr(module, key):
+                    memo[id(getattr(module, key))] = getattr(module, key)
+        return memo
+    
+    def restore(self, snapshot):
+        snapshot = copy.deepcopy(snapshot, self.get_shared_memo()) #keep snapshot reusable (e.g., as starting point of several simulations)
+        for mod in ['cap', 'load', 'harvester', 'converter']:
+            vars(getattr(self, mod)).update(snapshot.pop(mod))
+        vars(self).update(snapshot)
+        
+        #logs that are streamed to disk might already contain data recorded after the snapshot
+        for log in [self.log] + [getattr(getattr(self, mod), 'log', None) for mod in ['cap', 'load', 'harvester', 'converter']]:
+            if isinstance(log, LogRecorder):
+                log.truncate()
+    
+    def save_snapshot(self, file_path):
+        with open(f"{file_path}.tmp", 'wb') as file: #do not corrupt the previous snapshot if we crash while writing
+            pickle.dump(self.snapshot(), file)
+        os.replace(f"{file_path}.tmp", file_path)
+    
+    def load_snapshot(self, file_path):
+        with open(file_path, 'rb') as file:
+            self.restore(pickle.load(file))
+        
     #compute time until next update is necessary (i.e., the maximum timestep until the next state change happens in any of the modules)
     def compute_next_update(self, i):
                  
         #Get next update times from all the system's components
-        t_in_update = self.harvester.get_next_change(self.time)
-        t_load_update = self.load.get_next_change(self.time)
-        t_cap_update = self.cap.get_next_change(i, self.load.voltage_monitor.get_next_threshold(self.cap.voltage, i)) #tell us when we reach the next voltage threshold
-        t_converter_update = self.cap.get_next_change(i, self.converter.voltage_monitor.get_next_threshold(self.cap.voltage, i)) #TODO: get also information, when there will be an update in the converter
+        self.update_timer('harvester', self.harvester)
+        self.update_timer('load', self.load)
+        self.update_crossing('load_threshold', self.load.voltage_monitor, i) #tell us when we reach the next voltage threshold
+        self.update_crossing('converter_threshold', self.converter.voltage_monitor, i) #TODO: get also information, when there will be an update in the converter
+        if self.tolerance != None: #adaptive steps can get long, so we also have to stop at the voltage limits
+            self.update_crossing('limit', self.voltage_monitor, i)
         
-        self.updates = [t_in_update, t_load_update, t_cap_update, t_converter_update]        
+        if self.piecewise_constant:
+            #currents stay constant until the next event, so we can jump there directly (max_step_size only matters for logging)
+            monitors = [self.load.voltage_monitor, self.converter.voltage_monitor, self.voltage_monitor]
+            self.updates = [self.get_scheduled('harvester'), self.get_scheduled('load')] + [self.get_crossing_time(i, monitor.get_next_threshold(self.cap.voltage, i)) for monitor in monitors]
+            max_step = self.max_step if self.force_log else self.sim_end - self.time
+            t = min((x for x in self.updates if x is not None), default = max_step)
+            return min(max_step, t, self.sim_end - self.time)
         
-        t = min((x for x in self.updates if x is not None), default = self.max_step)
-        return min(self.max_step, t) # we make a simulation step at least every max_step_size
+        next_time = self.scheduler.get_next_time()
+        t = self.max_step if next_time == None else min(self.max_step, next_time - self.time) # we make a simulation step at least every max_step_size
+        return t if self.tolerance == None else self.get_adaptive_step(i, t)
+    
+    #largest step (up to the next event at t_max) for which the error of the capacitor voltage stays within the tolerance; steps with a 
+    #larger error are rejected and shrunk, the next step grows with the remaining margin (error ~ dt^2), by at most a factor of two
+    def get_adaptive_step(self, i, t_max):
+        dt = min(self.adaptive_step, t_max)
+        rejected = False
+        error, self.i_step = self.get_step_error(i, dt)
+        while error > self.tolerance and dt > 1:
+            dt = max(1, int(dt * max(0.2, 0.9 * np.sqrt(self.tolerance / error))))
+            rejected = True
+            error, self.i_step = self.get_step_error(i, dt)
+        if rejected or dt == self.adaptive_step: #keep the step size if the step only ended early because of an event
+            factor = 2 if error == 0 else min(2, 0.9 * np.sqrt(self.tolerance / error))
+            self.adaptive_step = int(max(1, min(self.max_step, dt * factor)))
+        return dt
+    
+    #error of a step with the current at its start (Euler), estimated by the difference to a step with the current at its midpoint, 
+    #i.e., at the voltage reached after half of the step (second order); returns the error and the current of the more accurate step 
+    #(including the leakage at the start of the step, which the capacitor subtracts)
+    def get_step_error(self, i, dt):
+        leakage = self.cap.get_leakage(i)
+        v_half = self.cap.voltage + (i - leakage) * dt / 2 * self.min_step_size / self.cap.capacitance
+        i_half = self.get_net_current(v_half) + leakage
+        return abs(i_half - i) * dt * self.min_step_size / self.cap.capacitance, i_half
+    
+    #current into the capacitor at the given voltage (at the current time, i.e., with the current states of the modules); the load current
+    #only changes with the state of the load
+    def get_net_current(self, v_cap):
+        v_in = self.converter.get_input_operating_voltage(v_cap, self.harvester_ocv, self.time)
+        i_in = self.harvester.get_current(self.time, v_in)
+        v_out = self.converter.get_output_operating_voltage(v_cap)
+        v_in_adjust = (v_in / v_cap) if v_cap > 0 else 1
+        v_out_adjust = (v_out / v_cap) if v_cap > 0 else 1
+        i_total = i_in * v_in_adjust * self.converter.get_input_efficiency(v_in, i_in) \
+            - self.i_out * v_out_adjust / self.converter.get_output_efficiency(v_cap, self.i_out) - self.converter.get_quiescent(v_cap)
+        return i_total - self.cap.get_leakage(i_total, v_cap)
+    
+    #time until the next scheduled update of the given source (if any)
+    def get_scheduled(self, source):
+        time = self.scheduler.get_time(source)
+        return None if time == None else time - self.time
+    
+    #reschedule a module's next update only if it is due, or if the module changed its state or next update
+    #(the modules assign new objects on any change, so comparing identities is enough and avoids comparing enums)
+    def update_timer(self, source, module):
+        next_update = getattr(module, 'next_update', None)
+        state = module.get_state() if hasattr(module, 'get_state') else None
+        timer = self.timers.get(source)
+        if timer != None and timer[0] is next_update and timer[1] is state and (timer[2] == None or timer[2] > self.time):
+            return
+        t = module.get_next_change(self.time)
+        time = None if t == None else self.time + t
+        self.timers[source] = (next_update, state, time)
+        self.scheduler.schedule(source, time)
+        
+    #reschedule the time the capacitor reaches the next threshold of the given voltage monitor; if the capacitor voltage changes linearly, 
+    #this time only changes with the current or the registered thresholds
+    def update_crossing(self, source, monitor, i):
+        crossing = self.crossings.get(source)
+        if crossing != None and crossing[0] == i and crossing[1] == monitor.version and (crossing[2] == None or crossing[2] > self.time) \
+            and self.cap.is_piecewise_constant():
+            return
+        
+        v_threshold = monitor.get_next_threshold(self.cap.voltage, i)
+        t = self.cap.get_next_change(i, v_threshold)
+        if t == None and v_threshold != None and self.tolerance != None and (i - self.cap.get_leakage(i)) * (v_threshold - self.cap.voltage) > 0:
+            t = 1 #less than a time unit away, cross the threshold with the next step instead of a full adaptive step
+        self.scheduler.schedule(source, None if t == None else self.time + t)
+        if t != None:
+            valid_until = self.time + t
+        else: #threshold cannot be reached (valid until current changes), or we are less than a time unit away (recompute in next step)
+            valid_until = None if v_threshold == None else self.time
+        self.crossings[source] = (i, monitor.version, valid_until)
+    
+    #time until the capacitor voltage reaches the given threshold; if we are already there, we cross it with a single time unit
+    def get_crossing_time(self, i, voltage_threshold):
+        if voltage_threshold == None:
+            return None
+        t = self.cap.get_next_change(i, voltage_threshold)
+        return 1 if t == None else t
+    
+    #check whether all currents stay constant until the next event (i.e., they do not depend on the capacitor voltage)
+    def is_piecewise_constant(self):
+        if self.v_in >= self.v_ov: #input is clipped at the overvoltage limit
+            return False
+        return self.harvester.is_piecewise_constant() and self.converter.is_piecewise_constant() \
+            and self.load.is_piecewise_constant() and self.cap.is_piecewise_constant()
      
     def log_data(self, time, force_log):
 
@@ -147,7 +391,7 @@ class Simulation:
     def process_log_data(self, keep_only_state_changes = False): 
     
         #self.log_old = self.log #debugging simulation  
-        self.log = pd.DataFrame(self.log)
+        self.log = self.log.to_dataframe()
                
         # Keep only first columns and columns, where the state has changed
         # if keep_only_state_changes:
@@ -212,7 +456,7 @@ Trade-off exploration tool
 """
 
 import multiprocessing as mp
-from itertools import product
+from itertools import product, chain
 import datetime
 import pickle
 import os
@@ -220,6 +464,15 @@ import pandas as pd
 import time
 import pathlib
 import json
+import tempfile
+import shutil
+import traceback
+import TraceStore
+from Journal import Journal
+from CostHistory import CostHistory, DEFAULT_FILE as COST_HISTORY_FILE
+from JobQueue import QueuePool
+from ResultCache import ResultCache, get_key, get_versions, has_stable_repr
+from Recorder import load_streamed_log
 
 def save_log_to_file(log_path, sim_num, parameter_settings, sim_instance):
     
@@ -244,6 +497,18 @@ def save_log_to_file(log_path, sim_num, parameter_settings, sim_instance):
             
         file.close()
                     
+#store parameter settings and processed logs next to the logs that were streamed during the simulation
+def save_log_to_dir(log_dir_path, parameter_settings, sim_instance):
+    
+        with open(os.path.join(log_dir_path, "settings.pkl"), 'wb') as file:
+            pickle.dump(parameter_settings, file)
+        
+        #add columns that are only computed after the simulation (e.g., dt, p_out)
+        for mod, recorder in sim_instance.log_recorders.items():
+            log = getattr(sim_instance, mod).get_log()
+            if isinstance(log, pd.DataFrame):
+                recorder.add_columns(log)
+                    
 def load_log_from_file(log_file_path):
     try:
         with open(log_file_path, 'r') as file:
@@ -273,27 +538,64 @@ def load_log_from_file_pkl(log_file_path):
         print(f"Error could find file: {log_file_path}")
         
     return param_settings, cap_log, load_log, harvester_log, converter_log
+
+#load logs that were streamed to the given directory (see setting 'stream_log_data')
+def load_log_from_dir(log_dir_path):
+    try:
+        with open(os.path.join(log_dir_path, "settings.pkl"), 'rb') as file:
+            param_settings = pickle.load(file)
+    except FileNotFoundError:
+        print(f"Error could find file: {os.path.join(log_dir_path, 'settings.pkl')}")
+        param_settings = None
+    
+    logs = []
+    for mod in ['cap', 'load', 'harvester', 'converter']:
+        if os.path.isfile(os.path.join(log_dir_path, mod, 'log.json')):
+            logs.append(load_streamed_log(os.path.join(log_dir_path, mod)))
+        else: #module does not log anything
+            logs.append(pd.DataFrame())
+        
+    return param_settings, *logs
         
     
 
 
-def run_experiment(num, params_to_change, base_config, metrics, settings, mapping_params):
+# Process-local templates of created simulations (only used in the workers of a TradeoffExplorer), such that the system
+# is only built once per worker and configuration; each experiment simulates a copy with its own parameters
+simulation_templates = None
+
+def create_simulation(base_config):
+    if simulation_templates == None:
+        return Simulation(base_config['capacitor'], base_config['harvester'], base_config['converter'], base_config['load'])
     
-    #print("Start simulation with:")
-    #print(params_to_change)
+    key = repr([base_config[mod] for mod in ['capacitor', 'harvester', 'converter', 'load']])
+    if key not in simulation_templates:
+        if len(simulation_templates) >= MAX_MODULE_TEMPLATES:
+            simulation_templates.clear()
+        simulation_templates[key] = Simulation(base_config['capacitor'], base_config['harvester'], base_config['converter'], base_config['load'])
+    return clone_simulation(simulation_templates[key])
+
+#copy of a (not yet simulated) simulation that shares the data loaded on construction of its modules with the original;
+#values derived from the modules' parameters are (re)computed on reset, i.e., parameters can be changed on the copy
+def clone_simulation(sim):
+    return copy.deepcopy(sim, sim.get_shared_memo())
+
+def create_experiment(params_to_change, base_config, settings, mapping_params):
     
     # Store simulation settings
     timestep = settings['timestep'] if 'timestep' in settings else 1e-3
-    store_log_data = settings['store_log_data'] if 'store_log_data' in settings else False
-    store_log_path = settings['log_path'] if 'log_path' in settings else '.'
-    normalize_stats = settings['normalize_stats'] if 'normalize_stats' in settings else False
-    
-    #print(f"Timestep: {timestep}.")
-    #print(f"Store log data: {store_log_data} (@ {store_log_path}).")
+    fast_forward = settings['fast_forward'] if 'fast_forward' in settings else False
+    tolerance = settings['tolerance'] if 'tolerance' in settings else None
+    profile = settings['profile'] if 'profile' in settings else False
+    stop_conditions = settings['stop_conditions'] if 'stop_conditions' in settings else []
     
     # Create simulation core with base configuration
-    sim = Simulation(base_config['capacitor'], base_config['harvester'], base_config['converter'], base_config['load'])
+    sim = create_simulation(base_config)
     sim.max_step_size = timestep
+    sim.fast_forward = fast_forward
+    sim.tolerance = tolerance
+    sim.profile = profile
+    sim.stop_conditions = stop_conditions
     
     result = {}
     # Adjust parameters in modules accordingly
@@ -302,13 +604,13 @@ def run_experiment(num, params_to_change, base_config, metrics, settings, mappin
             module_to_change = getattr(sim, param_to_change['module'])
         except AttributeError:
             print("Cannot change module parameter, as module does not exist! (Use 'cap', 'harvester', 'converter', or 'load'!)")
-            return -1 #TODO Error handling?
+            return None, -1 #TODO Error handling?
         
         if hasattr(module_to_change, param_to_change['param']):
             setattr(module_to_change, param_to_change['param'], param_to_change['value'])
         else:
             print(f"Cannot change module parameter {param_to_change['module']}.{param_to_change['param']}, as parameter does not exist!")
-            return -1 #TODO Error handling
+            return None, -1 #TODO Error handling
         
         #add parameter settings to result for later analysis
         result[f"{param_to_change['module']}.{param_to_change['param']}"] = param_to_change['value']
@@ -322,24 +624,21 @@ def run_experiment(num, params_to_change, base_config, metrics, settings, mappin
             map_value = mapping_param['mapping'][map_value]
         else:
             print(f"Cannot retrieve mapping parameter {mapping_param['module_to_map']}.{mapping_param['param_to_map']} while mapping, as parameter does not exist!")
-            return -1 #TODO Error handling
+            return None, -1 #TODO Error handling
         
         module_to_change = getattr(sim, mapping_param['module_to_change'])
         if hasattr(module_to_change, mapping_param['param_to_change']):
             setattr(module_to_change, mapping_param['param_to_change'], map_value)
         else:
             print(f"Cannot change module parameter {mapping_param['module_to_change']}.{mapping_param['param_to_change']} while mapping, as parameter does not exist!")
-            return -1 #TODO Error handling
+            return None, -1 #TODO Error handling
+    
+    return sim, result
+
+def get_experiment_metrics(sim, metrics, settings, result):
+    
+    normalize_stats = settings['normalize_stats'] if 'normalize_stats' in settings else False
     
-    # Run simulation
-    try:
-        sim.run(base_config['sim_time'])
-    except Exception as e:
-        print("Expection during simulation!!!")
-        print(e)
-        
-    #print("Simulation done.")
-                   
     # Extract requested metrics from simulator's modules
     try: 
         for module_metrics in metrics:
@@ -357,24 +656,271 @@ def run_experiment(num, params_to_change, base_config, metrics, settings, mappin
                     result[f"{module_metrics['module']}.{metric}"] = None
     except Exception as e:
         print(e)
+    
+    # Metrics of simulations that were ended by a stop condition only cover the simulated time
+    if len(sim.stop_conditions) > 0:
+        result['sim.truncated'] = sim.truncated
+        result['sim.stop_condition'] = sim.stopped_by
+        result['sim.time_skipped'] = sim.time_skipped
+    
+    return result
+
+# Settings (besides the timestep) that can change the results of an experiment
+RESULT_SETTINGS = ['fast_forward', 'tolerance', 'normalize_stats', 'stop_conditions']
+
+# Scheduling of the experiments of an exploration: number of similar experiments used to estimate the wall time of an experiment,
+# number of stored experiments (per configuration), and number of batches per worker process the experiments are split into
+COST_NEIGHBORS = 3
+MAX_COST_HISTORY = 500
+BATCHES_PER_PROCESS = 4
+
+# Estimated wall time of experiments without similar experiments simulated before (relative to the timestep of 1 ms): factor per
+# module that logs all its data, and factor of harvesters that read a trace
+LOG_COST_FACTOR = 1.4
+TRACE_COST_FACTOR = 1.2
+
+#cache of the experiments' results if requested (experiments that store their logs are always simulated)
+def get_result_cache(settings):
+    store_log_data = settings['store_log_data'] if 'store_log_data' in settings else False
+    stream_log_data = settings['stream_log_data'] if 'stream_log_data' in settings else False
+    if 'cache' not in settings or settings['cache'] == None or store_log_data or stream_log_data:
+        return None
+    if 'stop_conditions' in settings and not has_stable_repr(settings['stop_conditions']): #not part of a stable key
+        return None
+    return ResultCache(settings['cache'])
+
+#packages of the module implementations of the given configuration (e.g., 'Harvesters.SolarPanel')
+def get_module_packages(base_config):
+    return [f"{package}.{base_config[module]['type']}" for module, package in [('capacitor', 'Capacitors'), ('harvester', 'Harvesters'), ('converter', 'Converters'), ('load', 'Loads')]]
+
+#key of an experiment's result in the cache, changes with everything the result depends on (including the versions of the used modules);
+#without versions, the key only identifies the experiment (e.g., in the journal, which is resumed after changes of the source files as well)
+def get_experiment_key(params_to_change, base_config, metrics, settings, mapping_params, versions = True):
+    description = {'config' : base_config,
+                   'params' : {f"{p['module']}.{p['param']}" : p['value'] for p in params_to_change},
+                   'mapping_params' : mapping_params,
+                   'metrics' : metrics,
+                   'sim_time' : base_config['sim_time'],
+                   'timestep' : settings['timestep'] if 'timestep' in settings else 1e-3,
+                   'settings' : {key : settings[key] for key in RESULT_SETTINGS if key in settings}}
+    if versions:
+        description['versions'] = get_versions(get_module_packages(base_config))
+    return get_key(description)
+
+#version of Simba (i.e., of all its source files and the used module implementations) that simulates the given configuration
+def get_version(base_config):
+    return get_key(get_versions(get_module_packages(base_config)))
+
+#check whether a result is the error entry of a failed experiment (see TradeoffExplorer.run_options())
+def is_failed(result):
+    return not isinstance(result, dict) or 'error' in result
+
+#estimated wall time per simulated second of an experiment without history (relative, i.e., only comparable between experiments):
+#proportional to the number of steps, and higher for modules that log all their data and for harvesters that read a trace
+def get_prior_cost_rate(params_to_change, base_config, settings):
+    timestep = settings['timestep'] if 'timestep' in settings else 1e-3
+    store_log_data = settings['store_log_data'] if 'store_log_data' in settings else False
+    stream_log_data = settings['stream_log_data'] if 'stream_log_data' in settings else False
+    configs = {module : dict(base_config[name]['settings']) for module, name in [('cap', 'capacitor'), ('harvester', 'harvester'), ('converter', 'converter'), ('load', 'load')]}
+    for param_to_change in params_to_change: #(the modules store the 'log' setting as log_full)
+        if param_to_change['module'] in configs:
+            configs[param_to_change['module']]['log' if param_to_change['param'] == 'log_full' else param_to_change['param']] = param_to_change['value']
+    
+    rate = 1e-3 / timestep * LOG_COST_FACTOR**sum(1 for config in configs.values() if 'log' in config and config['log'])
+    if store_log_data or stream_log_data: #(the logs are stored after or written during the simulation)
+        rate *= LOG_COST_FACTOR
+    if 'file' in configs['harvester']:
+        rate *= TRACE_COST_FACTOR
+    return rate
+
+#values of the parameters to change (parameter -> value)
+def get_param_values(params_to_change):
+    return {f"{p['module']}.{p['param']}" : p['value'] for p in params_to_change}
+
+def cache_result(cache, result, params_to_change, base_config, metrics, settings, mapping_params):
+    key = get_experiment_key(params_to_change, base_config, metrics, settings, mapping_params)
+    info = {'sim_time' : base_config['sim_time'], 'timestep' : settings['timestep'] if 'timestep' in settings else 1e-3}
+    cache.put(key, result, {f"{p['module']}.{p['param']}" : p['value'] for p in params_to_change}, info)
+
+def run_experiment(num, params_to_change, base_config, metrics, settings, mapping_params):
+    
+    #print("Start simulation with:")
+    #print(params_to_change)
+    
+    # Store simulation settings
+    store_log_data = settings['store_log_data'] if 'store_log_data' in settings else False
+    store_log_path = settings['log_path'] if 'log_path' in settings else '.'
+    stream_log_data = settings['stream_log_data'] if 'stream_log_data' in settings else False #write logs to disk while simulating
+    
+    #print(f"Store log data: {store_log_data} (@ {store_log_path}).")
+    
+    # Return cached result if the same experiment was simulated before
+    cache = get_result_cache(settings)
+    if cache != None:
+        result = cache.get_result(get_experiment_key(params_to_change, base_config, metrics, settings, mapping_params))
+        if result != None:
+            return result
+    
+    # Create simulation core with base configuration and adjust parameters
+    sim, result = create_experiment(params_to_change, base_config, settings, mapping_params)
+    if sim == None:
+        return result
+    if stream_log_data:
+        sim.log_stream_path = os.path.join(store_log_path, f"log_sim{num}")
+    
+    # Run simulation
+    failed = False
+    try:
+        sim.run(base_config['sim_time'])
+    except Exception as e:
+        print("Expection during simulation!!!")
+        print(e)
+        failed = True
+        if 'journal' in settings:
+            raise #the experiment is recorded as failed (with its traceback) in the journal
+        
+    #print("Simulation done.")
+                   
+    result = get_experiment_metrics(sim, metrics, settings, result)
+    if result == -1:
+        return result
+    if cache != None and not failed:
+        cache_result(cache, result, params_to_change, base_config, metrics, settings, mapping_params)
        
     # Store detailed log of simulation to file if requested
-    if store_log_data:
+    if stream_log_data:
+        save_log_to_dir(sim.log_stream_path, result, sim)
+    elif store_log_data:
         save_log_to_file(store_log_path, num, result, sim)
             
     return result
 
+
+#parameters (of the base configuration's modules) that only have an effect once the capacitor voltage crosses them
+def get_late_params(params, base_config, mapping_params):
+    module_configs = {'cap' : ('Capacitors', base_config['capacitor']), 
+                      'harvester' : ('Harvesters', base_config['harvester']),
+                      'converter' : ('Converters', base_config['converter']), 
+                      'load' : ('Loads', base_config['load'])}
+    mapped_params = [f"{m['module_to_map']}.{m['param_to_map']}" for m in mapping_params] + [f"{m['module_to_change']}.{m['param_to_change']}" for m in mapping_params]
     
-def run_tradeoff_exploration(params, metrics, base_config, settings = {}, mapping_params = []):
-    result_list = []
-    process_results = []
+    late_params = {}
+    for key in params.keys():
+        module, param = key.split(".")
+        if module not in module_configs or key in mapped_params:
+            continue
+        package, config = module_configs[module]
+        cls = getattr(importlib.import_module(f'{package}.{config["type"]}'), config['type'])
+        if param in getattr(cls, 'late_params', {}):
+            late_params[key] = cls.late_params[param] #edge on which the parameter takes effect
+    return late_params
+
+#thresholds (edge, voltages) of the late parameters of the given experiments
+def get_late_thresholds(param_options, late_params):
+    return [(edge, [p['value'] for params_to_change in param_options for p in params_to_change if f"{p['module']}.{p['param']}" == key]) for key, edge in late_params.items()]
+
+#check whether the next simulation step reaches any of the given thresholds
+def reaches_late_thresholds(sim, thresholds):
+    for edge, voltages in thresholds:
+        v_threshold = max(voltages) if edge == 'falling' else min(voltages) #first threshold that is reached
+        if (edge == 'falling' and sim.cap.voltage <= v_threshold) or (edge == 'rising' and sim.cap.voltage >= v_threshold):
+            return True
+        t = sim.cap.get_next_change(sim.i_total, v_threshold)
+        approaching = sim.i_total < 0 if edge == 'falling' else sim.i_total > 0
+        if approaching and (t == None or t <= sim.dt): #None: we are less than a time unit away
+            return True
+    return False
+
+def set_late_params(sim, params_to_change, late_params):
+    for param_to_change in params_to_change:
+        if f"{param_to_change['module']}.{param_to_change['param']}" in late_params:
+            module_to_change = getattr(sim, param_to_change['module'])
+            setattr(module_to_change, param_to_change['param'], param_to_change['value'])
+            if hasattr(module_to_change, 'update_thresholds'):
+                module_to_change.update_thresholds()
+
+#run several experiments that only differ in late parameters: the experiments share a simulation (trunk) until their late parameters take effect, 
+#then each experiment continues from a snapshot of the trunk. Returns (params_to_change, result) of each experiment (in any order); if a journal
+#is used, experiments that raise an exception are returned as error entries with their traceback (see run_experiment())
+def run_forked_experiments(nums, param_options, late_params, base_config, metrics, settings, mapping_params):
+    
+    store_log_data = settings['store_log_data'] if 'store_log_data' in settings else False
+    store_log_path = settings['log_path'] if 'log_path' in settings else '.'
+    cache = get_result_cache(settings)
+    
+    sim, result = create_experiment(param_options[0], base_config, settings, mapping_params)
+    if sim == None:
+        return [(params_to_change, result) for params_to_change in param_options]
+    
+    remaining = list(zip(nums, param_options))
+    def diverges(sim):
+        return sim.time + sim.dt >= sim.sim_end or reaches_late_thresholds(sim, get_late_thresholds([p for _, p in remaining], late_params))
     
-    def log_result(result):
-        # This is called whenever foo_pool(i) returns a result.
-        # result_list is modified only by the main process, not the pool workers.
-        result_list.append(result)
+    def run_alone(num, params_to_change):
+        try:
+            return params_to_change, run_experiment(num, params_to_change, base_config, metrics, settings, mapping_params)
+        except Exception: #(only raised if a journal is used)
+            return params_to_change, {**get_param_values(params_to_change), 'error' : traceback.format_exc()}
+    
+    try:
+        sim.run(base_config['sim_time'], stop = diverges)
+    except Exception as e:
+        print("Expection during simulation!!!")
+        print(e)
+        return [run_alone(num, params_to_change) for num, params_to_change in remaining]
+    
+    # The trunk was ended by a stop condition before any late parameter took effect, i.e., all experiments have the same outcome
+    if sim.truncated:
+        results = []
+        for num, params_to_change in remaining:
+            result = get_experiment_metrics(sim, metrics, settings, {f"{p['module']}.{p['param']}" : p['value'] for p in params_to_change})
+            if result != -1 and store_log_data:
+                save_log_to_file(store_log_path, num, result, sim)
+            if result != -1 and cache != None:
+                cache_result(cache, result, params_to_change, base_config, metrics, settings, mapping_params)
+            results.append((params_to_change, result))
+        return results
+    
+    results = []
+    while len(remaining) > 0:
+        snapshot = sim.snapshot()
+        
+        # Experiments whose late parameters take effect in the next step continue on their own
+        at_end = sim.time >= sim.sim_end or sim.time + sim.dt >= sim.sim_end
+        forks = [(num, p) for num, p in remaining if at_end or reaches_late_thresholds(sim, get_late_thresholds([p], late_params))]
+        for num, params_to_change in forks if len(forks) > 0 else remaining[:1]:
+            sim.restore(snapshot)
+            set_late_params(sim, params_to_change, late_params)
+            failed = False
+            try:
+                sim.execute()
+            except Exception as e:
+                print("Expection during simulation!!!")
+                print(e)
+                failed = True
+                if 'journal' in settings: #the experiment is recorded as failed (with its traceback) in the journal
+                    results.append((params_to_change, {**get_param_values(params_to_change), 'error' : traceback.format_exc()}))
+                    remaining.remove((num, params_to_change))
+                    continue
+            
+            result = {f"{p['module']}.{p['param']}" : p['value'] for p in params_to_change}
+            result = get_experiment_metrics(sim, metrics, settings, result)
+            if result != -1 and store_log_data:
+                save_log_to_file(store_log_path, num, result, sim)
+            if result != -1 and cache != None and not failed:
+                cache_result(cache, result, params_to_change, base_config, metrics, settings, mapping_params)
+            results.append((params_to_change, result))
+            remaining.remove((num, params_to_change))
+        
+        # Continue trunk with the remaining experiments
+        if len(remaining) > 0:
+            sim.restore(snapshot)
+            set_late_params(sim, remaining[0][1], late_params)
+            sim.execute(stop = diverges)
+    
+    return results
     
-    # Decode given parameters to explore accordingly
+def get_parameter_options(params):
     parameter_options = list(product(*params.values())) #Permutate all provided parameters
     module_list = [key.split(".")[0] for key in params.keys()]
     param_list = [key.split(".")[1] for key in params.keys()]
@@ -383,34 +929,442 @@ def run_tradeoff_exploration(params, metrics, base_config, settings = {}, mappin
     for parameters in parameter_options:
         params_to_change = [{'module' : module_list[i], 'param' : param_list[i], 'value' : val} for i, val in enumerate(parameters)]
         param_options.append(params_to_change)
+    return param_options
     
-    # Since we have all paramter options, we can now start a simulation for each option
-    start = datetime.datetime.now()
-    pool = mp.Pool(min(int(mp.cpu_count()/2), len(param_options)))
-    print(f"Create {min(int(mp.cpu_count()/2), len(param_options))} processes.")
-    
-    # Each simulation runs in a seperate process and concurrently
-    for num, params_to_change in enumerate(param_options):
-        process_result = pool.apply_async(run_experiment, args = (num, params_to_change, base_config, metrics, settings, mapping_params), callback=log_result)
-        process_results.append(process_result)
-    # Close Pool and let all the processes complete    
-    pool.close()
-    pool.join()  # postpones the execution of next line of code until all processes in the queue are done.
-    
-    while True:
-        time.sleep(1)
-        # catch exception if results are not ready yet
+#add the metrics of the given objectives (e.g., 'load.forward_progress') to the requested metrics
+def add_objective_metrics(metrics, objectives):
+    metrics = copy.deepcopy(metrics)
+    for key in objectives:
+        module, metric = key.split(".")
+        module_metrics = [m for m in metrics if m['module'] == module]
+        if len(module_metrics) == 0:
+            metrics.append({'module' : module, 'params' : [metric]})
+        elif metric not in module_metrics[0]['params']:
+            module_metrics[0]['params'].append(metric)
+    return metrics
+
+#values of the given objectives of a result (negated for objectives that are maximized, i.e., all values are minimized), None if invalid
+def get_objective_values(result, objectives):
+    values = [result[key] if key in result else None for key in objectives]
+    if any(value == None or value != value for value in values):
+        return None
+    return [value if goal == 'min' else -value for value, goal in zip(values, objectives.values())]
+
+#results that are not dominated by any other result in the given objectives (metric -> 'min' or 'max'), i.e., no other result
+#is at least as good in all objectives and better in one; results without valid values or that violate the constraint are ignored
+def get_pareto_front(results, objectives, constraint = None):
+    candidates = []
+    for result in results:
+        values = get_objective_values(result, objectives)
+        if values == None or (constraint != None and not constraint(result)):
+            continue
+        candidates.append((result, values))
+
+    front = []
+    for result, values in candidates:
+        if not any(all(o <= v for o, v in zip(other, values)) and any(o < v for o, v in zip(other, values)) for _, other in candidates):
+            front.append(result)
+    return front
+
+#run a batch of jobs (function, arguments) in a worker process; returns the result, wall time and traceback (if it raised) of each job
+def run_jobs(jobs):
+    outputs = []
+    for function, args in jobs:
+        start = time.perf_counter()
         try:
-            ready = [result.ready() for result in process_results]
-            successful = [result.successful() for result in process_results]
+            outputs.append((function(*args), time.perf_counter() - start, None))
         except Exception:
-            continue
-        # exit loop if all tasks returned success
-        if all(successful):
-            break
-        # raise exception reporting exceptions received from workers
-        if all(ready) and not all(successful):
-            raise Exception(f'Workers raised following exceptions {[result._value for result in process_results if not result.successful()]}')
-    
-    print(f"Total time : {datetime.datetime.now() - start}")
-    return result_list
\ No newline at end of file
+            outputs.append((None, time.perf_counter() - start, traceback.format_exc()))
+    return outputs
+
+#initialize a worker process of a TradeoffExplorer: keep the modules' traces and lookup tables loaded between simulations,
+#and use the harvesting traces published by the main process
+def init_worker(trace_directory):
+    global module_templates, simulation_templates
+    module_templates = {}
+    simulation_templates = {}
+    TraceStore.attach(trace_directory)
+
+class TradeoffExplorer:
+    
+    #the pool of worker processes is kept (with its loaded traces, lookup tables etc.) until close() is called, 
+    #such that repeated explorations (e.g., within loops) do not pay its startup costs again.
+    #If a queue (SQLite file) is given, the experiments are submitted to this job queue instead and run by its workers
+    #(see JobQueue.py, possibly on several machines), processes is then the expected number of workers.
+    #The wall times of the experiments are stored in the given file (None = only kept by this explorer) to schedule later explorations
+    def __init__(self, processes = None, queue = None, cost_history = COST_HISTORY_FILE):
+        processes = processes if processes != None else mp.cpu_count()
+        self.processes = processes
+        self.history = CostHistory(cost_history, MAX_COST_HISTORY) #configuration (see get_cost_key()) -> [(parameter values, wall time per simulated second)] of finished experiments
+        self.published = set() #harvester configurations whose traces are published
+        if queue != None:
+            #the traces are published next to the queue, such that the workers (on the shared filesystem) can use them
+            self.trace_directory = tempfile.mkdtemp(prefix = 'simba_traces_', dir = os.path.dirname(os.path.abspath(queue)))
+            self.pool = QueuePool(queue, self.trace_directory)
+            print(f"Submit experiments to job queue {queue}.")
+        else:
+            self.trace_directory = tempfile.mkdtemp(prefix = 'simba_traces_')
+            self.pool = mp.Pool(processes, initializer = init_worker, initargs = (self.trace_directory,))
+            print(f"Create {processes} processes.")
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, *args):
+        if exc_type != None:
+            self.pool.terminate() #e.g., interrupted exploration, do not wait for the remaining experiments
+        self.close()
+        
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        shutil.rmtree(self.trace_directory, ignore_errors = True)
+    
+    #load the harvesting traces of the base configuration once in this process and share them with the workers (memory-mapped)
+    def publish_traces(self, base_config):
+        if repr(base_config['harvester']) in self.published:
+            return
+        self.published.add(repr(base_config['harvester']))
+        try:
+            harvester_factory(base_config['harvester'], 1e-6)
+        except Exception:
+            return #configuration is invalid, the workers report the error
+        TraceStore.publish(self.trace_directory)
+    
+    #configurations with similar simulation speed
+    def get_cost_key(self, base_config, settings):
+        store_log_data = settings['store_log_data'] if 'store_log_data' in settings else False
+        stream_log_data = settings['stream_log_data'] if 'stream_log_data' in settings else False
+        description = repr({key : settings[key] for key in RESULT_SETTINGS + ['timestep'] if key in settings})
+        return (base_config['capacitor']['type'], base_config['harvester']['type'], base_config['converter']['type'], base_config['load']['type'],
+                store_log_data or stream_log_data, description if has_stable_repr(description) else None) #(e.g., lambdas as stop conditions)
+    
+    #estimated wall time of an experiment per simulated second, based on the most similar experiments (parameter values) simulated before
+    #with the same configuration (by any explorer using the same history file), or on the experiment's configuration if there are none
+    def get_cost_rate(self, cost_key, params_to_change, base_config, settings):
+        history = self.history.get(cost_key)
+        param_values = get_param_values(params_to_change)
+        if len(history) == 0:
+            return get_prior_cost_rate(params_to_change, base_config, settings)
+        
+        def distance(values):
+            if values.keys() != param_values.keys():
+                return len(param_values) + 1
+            return sum(min(1, abs(values[key] - value) / max(abs(values[key]), abs(value))) if isinstance(value, (int, float)) and isinstance(values[key], (int, float)) and value != values[key]
+                       else float(values[key] != value) for key, value in param_values.items())
+        nearest = sorted(history, key = lambda entry: distance(entry[0]))[:COST_NEIGHBORS]
+        return sum(rate for _, rate in nearest) / len(nearest)
+    
+    def add_cost_history(self, cost_key, param_values, wall_time, sim_time):
+        self.history.add(cost_key, param_values, wall_time / max(sim_time, 1e-9))
+    
+    def run(self, params, metrics, base_config, settings = {}, mapping_params = []):
+        # Decode given parameters to explore accordingly
+        return self.run_options(get_parameter_options(params), metrics, base_config, settings, mapping_params)
+    
+    #run the given parameter options (i.e., lists of parameters to change, see get_parameter_options())
+    def run_options(self, param_options, metrics, base_config, settings = {}, mapping_params = []):
+        result_list = []
+        process_results = []
+        if len(param_options) == 0:
+            return result_list
+        
+        journal = Journal(settings['journal']) if 'journal' in settings and settings['journal'] != None else None
+        progress = settings['progress'] if 'progress' in settings else True
+        failed = [] #parameter values of failed experiments
+        errors = [] #tracebacks of these exceptions
+        start = datetime.datetime.now()
+        
+        def show_progress():
+            done = len(result_list)
+            elapsed = (datetime.datetime.now() - start).total_seconds()
+            eta = elapsed / (done - skipped) * (len(param_options) - done) if done > skipped else 0
+            print(f"\rProgress: {done}/{len(param_options)} experiments done ({len(failed)} failed), "
+                  f"elapsed {datetime.timedelta(seconds = round(elapsed))}, ETA {datetime.timedelta(seconds = round(eta))}.", end = '', flush = True)
+        
+        def log_result(result, params_to_change):
+            # This is called whenever foo_pool(i) returns a result.
+            # result_list is modified only by the main process, not the pool workers.
+            result_list.append(result)
+            if not isinstance(result, dict):
+                failed.append(get_param_values(params_to_change))
+            if journal != None:
+                key = get_experiment_key(params_to_change, base_config, metrics, settings, mapping_params, versions = False)
+                if isinstance(result, dict):
+                    journal.record(key, get_param_values(params_to_change), result, version = version)
+                else:
+                    journal.record(key, get_param_values(params_to_change), error = f"Experiment failed (result: {result}).", version = version)
+            if progress:
+                show_progress()
+        
+        def log_results(results):
+            # the experiments of a group finish in any order, each result is returned with its parameters
+            for params_to_change, result in results:
+                if isinstance(result, dict) and 'error' in result: #raised an exception (see run_forked_experiments())
+                    log_error(result['error'], [params_to_change])
+                else:
+                    log_result(result, params_to_change)
+        
+        def log_error(error, options):
+            # Record all experiments of the failed job with the traceback of the exception
+            for params_to_change in options:
+                errors.append(error)
+                failed.append(get_param_values(params_to_change))
+                result_list.append({**get_param_values(params_to_change), 'error' : error})
+                if journal != None:
+                    journal.record(get_experiment_key(params_to_change, base_config, metrics, settings, mapping_params, versions = False), get_param_values(params_to_change), error = error, version = version)
+            if progress:
+                show_progress()
+        
+        # Group options that only differ in late parameters, they share the simulation until these parameters take effect
+        fork_late_params = settings['fork_late_params'] if 'fork_late_params' in settings else False
+        stream_log_data = settings['stream_log_data'] if 'stream_log_data' in settings else False
+        params = {f"{p['module']}.{p['param']}" : None for p in param_options[0]}
+        late_params = get_late_params(params, base_config, mapping_params) if fork_late_params and not stream_log_data else {}
+        
+        # Experiments that were simulated before are taken from the cache or the journal of an interrupted exploration (if requested)
+        cache = get_result_cache(settings)
+        if cache == None and 'cache' in settings and settings['cache'] != None and not has_stable_repr(settings['stop_conditions'] if 'stop_conditions' in settings else []):
+            print("Results are not cached, as the stop conditions have no stable repr (e.g., lambdas, see StopConditions.py).")
+        groups = {}
+        resumed = 0
+        outdated = 0 #resumed experiments that were simulated with other source files
+        version = get_version(base_config) if journal != None else None
+        for num, params_to_change in enumerate(param_options):
+            if cache != None:
+                result = cache.get_result(get_experiment_key(params_to_change, base_config, metrics, settings, mapping_params))
+                if result != None:
+                    result_list.append(result)
+                    continue
+            if journal != None:
+                key = get_experiment_key(params_to_change, base_config, metrics, settings, mapping_params, versions = False)
+                if key in journal.results:
+                    result_list.append(journal.results[key])
+                    resumed += 1
+                    outdated += journal.versions.get(key) != version
+                    continue
+            key = repr([p['value'] for p in params_to_change if f"{p['module']}.{p['param']}" not in late_params])
+            groups.setdefault(key, []).append(num)
+        
+        if cache != None:
+            print(f"Use {len(result_list) - resumed} cached results, simulate {len(param_options) - len(result_list)} experiments.")
+        if journal != None and resumed > 0:
+            print(f"Resume {resumed} finished experiments from {journal.file_path}.")
+        if outdated > 0:
+            print(f"Warning: {outdated} of the resumed experiments were simulated with other source files of Simba (use a new journal to simulate them again).")
+        skipped = len(result_list)
+        
+        # Since we have all paramter options, we can now start a simulation for each option
+        self.publish_traces(base_config)
+        
+        # Jobs: a single experiment, or a group of experiments that only differ in late parameters
+        jobs = []
+        for nums in groups.values():
+            options = [param_options[num] for num in nums]
+            if len(nums) > 1 and late_params:
+                jobs.append(((run_forked_experiments, (nums, options, late_params, base_config, metrics, settings, mapping_params)), options))
+            else:
+                jobs += [((run_experiment, (num, param_options[num], base_config, metrics, settings, mapping_params)), [param_options[num]]) for num in nums]
+        
+        # Combine the jobs into batches with about the same estimated wall time, such that short jobs do not wait for the communication
+        # with the workers and no batch is left long after the others: the longest remaining job is added to the batch with the
+        # lowest estimate, i.e., batches start with their longest jobs, and jobs with equal estimates (e.g., without similar
+        # experiments in the history) are spread over all batches instead of combining neighboring parameter values
+        cost_key = self.get_cost_key(base_config, settings)
+        costs = [sum(self.get_cost_rate(cost_key, params_to_change, base_config, settings) for params_to_change in options) * base_config['sim_time'] for _, options in jobs]
+        order = sorted(range(len(jobs)), key = lambda i: -costs[i])
+        batches = [[0, []] for _ in range(min(len(jobs), self.processes * BATCHES_PER_PROCESS))]
+        for i in order:
+            batch = min(batches, key = lambda batch: batch[0])
+            batch[0] += costs[i]
+            batch[1].append(jobs[i])
+        
+        def log_batch(outputs, batch):
+            for (result, wall_time, error), (_, options) in zip(outputs, batch):
+                if error != None:
+                    log_error(error, options)
+                    continue
+                for params_to_change in options:
+                    self.add_cost_history(cost_key, get_param_values(params_to_change), wall_time / len(options), base_config['sim_time'])
+                if isinstance(result, list):
+                    log_results(result)
+                else:
+                    log_result(result, options[0])
+        
+        # Each batch runs in a seperate process and concurrently (the results are recorded as soon as they are received)
+        for _, batch in batches:
+            process_result = self.pool.apply_async(run_jobs, args = ([job for job, _ in batch],),
+                                                   callback = lambda outputs, batch = batch: log_batch(outputs, batch),
+                                                   error_callback = lambda error, batch = batch: [log_error(''.join(traceback.format_exception(type(error), error, error.__traceback__)), options) for _, options in batch])
+            process_results.append(process_result)
+        
+        # Wait until all simulations are done (the pool stays open for further explorations)
+        try:
+            for process_result in process_results:
+                process_result.wait()
+        finally:
+            if progress and len(process_results) > 0:
+                print()
+            if journal != None:
+                journal.close()
+            self.history.save()
+        
+        # Failed experiments are returned as error entries (parameter values and traceback) along with the other results,
+        # raise an exception reporting them instead if requested
+        raise_errors = settings['raise_errors'] if 'raise_errors' in settings else False
+        if raise_errors and len(errors) > 0:
+            raise Exception(f'Workers raised following exceptions {errors}')
+        if len(failed) > 0:
+            print(f"{len(failed)} experiments failed" + (f", see {journal.file_path} for their tracebacks." if journal != None else " (see the 'error' entries of the results)."))
+        
+        print(f"Total time : {datetime.datetime.now() - start}")
+        return result_list
+
+    #find the first value of a parameter for which a monotone predicate over the metrics of an experiment holds, e.g.,
+    #predicate = lambda result: result['load.num_CHECKPOINT_successful'] >= 1 for params = {'cap.capacitance' : <CAPACITANCES>}:
+    #the values have to be ordered such that the predicate holds for all values after the first one for which it holds.
+    #Instead of simulating all values, the remaining interval is split into as many sections as there are workers in each round.
+    #For two parameters, the boundary of the second parameter is searched for each value of the first one (the predicate has to
+    #be monotone in both parameters, such that the results for one value also narrow the search for the others).
+    #Failed experiments (see is_failed()) are treated as unknown, i.e., the search continues with the other values of the interval.
+    #Returns the first value (or None) for one parameter, a dict (first parameter's value -> first value of the second one)
+    #for two parameters, and the results of all simulated experiments (including the error entries of failed experiments).
+    def search(self, params, predicate, metrics, base_config, settings = {}, mapping_params = []):
+        keys = list(params.keys())
+        assert 1 <= len(keys) <= 2, "Error: Search requires one or two parameters."
+        outer = params[keys[0]] if len(keys) == 2 else [None]
+        values = params[keys[-1]]
+        
+        def get_params_to_change(i, j):
+            points = [(keys[0], outer[i]), (keys[1], values[j])] if len(keys) == 2 else [(keys[0], values[j])]
+            return [{'module' : key.split(".")[0], 'param' : key.split(".")[1], 'value' : value} for key, value in points]
+        
+        bounds = [[-1, len(values)] for _ in outer] #[last index known to fail, first index known to hold] per value of the first parameter
+        unknown = set() #points (i, j) whose experiment failed
+        results = []
+        
+        def get_candidates(i):
+            low, high = bounds[i]
+            return [j for j in range(low + 1, high) if (i, j) not in unknown]
+        
+        while True:
+            active = [i for i in range(len(outer)) if len(get_candidates(i)) > 0]
+            if len(active) == 0:
+                break
+            
+            # Split the remaining intervals (without the failed points), such that each worker simulates one point per round
+            sections = max(1, self.processes // len(active))
+            points = []
+            for i in active:
+                candidates = get_candidates(i)
+                n = min(sections, len(candidates))
+                points += [(i, candidates[k]) for k in sorted(set(min(len(candidates) - 1, max(0, round((len(candidates) + 1) * (m + 1) / (n + 1)) - 1)) for m in range(n)))]
+            
+            round_results = self.run_options([get_params_to_change(i, j) for i, j in points], metrics, base_config, settings, mapping_params)
+            results += round_results
+            round_results = {tuple(result[key] for key in keys) : result for result in round_results if not is_failed(result)}
+            
+            for i, j in points:
+                point = (outer[i], values[j]) if len(keys) == 2 else (values[j],)
+                if point not in round_results:
+                    unknown.add((i, j))
+                    continue
+                holds = predicate(round_results[point])
+                # The predicate holds for all following values (of both parameters), and fails for all previous ones
+                for k in range(len(outer)):
+                    if holds and k >= i:
+                        bounds[k][1] = min(bounds[k][1], j)
+                    elif not holds and k <= i:
+                        bounds[k][0] = max(bounds[k][0], j)
+        
+        # The boundary is only known up to the failed points between the last value that fails and the first one that holds
+        for i, (low, high) in enumerate(bounds):
+            uncertain = [values[j] for j in range(low + 1, high) if (i, j) in unknown]
+            if len(uncertain) > 0:
+                print(f"Warning: Experiments failed during search, the first value {'' if len(keys) == 1 else f'for {keys[0]} = {outer[i]} '}"
+                      f"might also be one of {uncertain} (see the error entries of the results).")
+        
+        boundary = [values[high] if high < len(values) else None for _, high in bounds]
+        return (dict(zip(outer, boundary)) if len(keys) == 2 else boundary[0]), results
+
+    #explore the given parameters adaptively to find the Pareto front of the given objectives (metric -> 'min' or 'max'), e.g.,
+    #objectives = {'load.forward_progress' : 'max', 'load.time_unavailable_95' : 'min'}. The values of each parameter have to be ordered
+    #(e.g., increasing capacitances). Starting with a coarse grid, each cell of the grid is split in halves (per parameter) as long as
+    #it might contain a part of the front, i.e., as long as the best values of its corners (per objective), improved by the spread
+    #of the corners' values, are not dominated by the current front; cells that are dominated are not explored further. The result
+    #is an approximation of the front of the full grid: it is exact if no option inside a cell is better than this bound (e.g., for
+    #objectives that change smoothly), but can miss options of objectives that change abruptly (e.g., numbers of events) or are
+    #equal at all corners of a cell. Options whose results do not fulfill constraint(result) are never part of the front.
+    #Stops once all cells are refined to the given values or after max_experiments simulated experiments.
+    #Returns the results on the Pareto front and the results of all simulated experiments.
+    def explore_pareto(self, params, objectives, metrics, base_config, settings = {}, mapping_params = [], constraint = None, max_experiments = None, samples = 5):
+        keys = list(params.keys())
+        metrics = add_objective_metrics(metrics, objectives)
+        indices = [{value : i for i, value in enumerate(params[key])} for key in keys]
+        
+        def get_params_to_change(point):
+            return [{'module' : key.split(".")[0], 'param' : key.split(".")[1], 'value' : params[key][i]} for key, i in zip(keys, point)]
+        
+        # Start with a coarse grid (about the given number of samples per parameter, including the last value)
+        steps = [2**int(np.log2(max(1, (len(params[key]) - 1) / (samples - 1)))) for key in keys]
+        grid = [sorted(set(range(0, len(params[key]), step)) | {len(params[key]) - 1}) for key, step in zip(keys, steps)]
+        cells = list(product(*[list(zip(coords[:-1], coords[1:])) if len(coords) > 1 else [(coords[0], coords[0])] for coords in grid])) #(first, last) index per parameter
+        points = list(product(*grid))
+        
+        # Cells might contain a part of the front if a corner failed, or if their bound is not dominated by the front; the bound is the
+        # best value of the corners per objective, improved by the spread of the corners' values (i.e., options inside the cell may be
+        # better than all corners, as long as the objective does not change more than between the corners)
+        def is_open(cell, front):
+            corners = []
+            for corner in product(*cell):
+                if results[corner] == None:
+                    return True
+                values = get_objective_values(results[corner], objectives)
+                if values != None and (constraint == None or constraint(results[corner])):
+                    corners.append(values)
+            if len(corners) == 0:
+                return False
+            bound = [2*min(values) - max(values) for values in zip(*corners)]
+            return not any(all(f <= b for f, b in zip(other, bound)) and any(f < b for f, b in zip(other, bound)) for other in front)
+        
+        results = {} #point (indices of the values) -> result
+        while True:
+            if max_experiments != None:
+                points = points[:max(0, max_experiments - len(results))]
+            if len(points) > 0:
+                for result in self.run_options([get_params_to_change(point) for point in points], metrics, base_config, settings, mapping_params):
+                    if not is_failed(result):
+                        results[tuple(indices[k][result[key]] for k, key in enumerate(keys))] = result
+                for point in points:
+                    results.setdefault(point, None) #failed experiments are not simulated again
+            if max_experiments != None and len(results) >= max_experiments:
+                break
+            
+            # Split the open cells that contain values that were not simulated yet
+            front = [get_objective_values(result, objectives) for result in get_pareto_front([result for result in results.values() if result != None], objectives, constraint)]
+            cells = [cell for cell in cells if any(high - low > 1 for low, high in cell) and is_open(cell, front)]
+            cells = list(chain.from_iterable(product(*[[(low, (low + high) // 2), ((low + high) // 2, high)] if high - low > 1 else [(low, high)] for low, high in cell]) for cell in cells))
+            if len(cells) == 0:
+                break
+            points = sorted(set(chain.from_iterable(product(*cell) for cell in cells)) - results.keys())
+        
+        results = [result for result in results.values() if result != None]
+        return get_pareto_front(results, objectives, constraint), results
+
+#explore all given parameter options using a new pool of worker processes (see TradeoffExplorer to reuse the pool for several explorations)
+def run_tradeoff_exploration(params, metrics, base_config, settings = {}, mapping_params = []):
+    processes = min(settings['processes'] if 'processes' in settings else mp.cpu_count(), len(get_parameter_options(params)))
+    with TradeoffExplorer(processes, settings['queue'] if 'queue' in settings else None, settings['cost_history'] if 'cost_history' in settings else COST_HISTORY_FILE) as explorer:
+        return explorer.run(params, metrics, base_config, settings, mapping_params)
+
+#search the boundary of a monotone predicate using a new pool of worker processes (see TradeoffExplorer.search())
+def run_search(params, predicate, metrics, base_config, settings = {}, mapping_params = []):
+    with TradeoffExplorer(settings['processes'] if 'processes' in settings else None, settings['queue'] if 'queue' in settings else None,
+                          settings['cost_history'] if 'cost_history' in settings else COST_HISTORY_FILE) as explorer:
+        return explorer.search(params, predicate, metrics, base_config, settings, mapping_params)
+
+#explore the Pareto front of the given objectives using a new pool of worker processes (see TradeoffExplorer.explore_pareto())
+def run_pareto_exploration(params, objectives, metrics, base_config, settings = {}, mapping_params = [], constraint = None, max_experiments = None):
+    with TradeoffExplorer(settings['processes'] if 'processes' in settings else None, settings['queue'] if 'queue' in settings else None,
+                          settings['cost_history'] if 'cost_history' in settings else COST_HISTORY_FILE) as explorer:
+        return explorer.explore_pareto(params, objectives, metrics, base_config, settings, mapping_params, constraint, max_experiments)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Helper classes: Stop conditions
+
+Conditions that end a simulation as soon as its outcome is decided (e.g., whether a checkpoint succeeds at least once),
+see `Simulation.run(until, stop_conditions = [...])`. Each condition is evaluated after every simulation step and returns
+True once the simulation can be stopped; any callable `condition(sim)` can be used as well (the classes below can also
+be pickled, i.e., passed to the workers of a trade-off exploration).
+"""
+
+#a statistic of a module (e.g., the load's 'num_CHECKPOINT_successful') reached the given value
+class StatReached:
+
+    def __init__(self, module, stat, value = 1):
+        self.module = module
+        self.stat = stat
+        self.value = value
+
+    def __call__(self, sim):
+        stats = getattr(getattr(sim, self.module), 'stats', {})
+        return self.stat in stats and stats[self.stat] >= self.value
+
+    def __repr__(self):
+        return f"{self.module}.{self.stat} >= {self.value}"
+
+#the load entered the given state (e.g., 'OFF')
+class LoadState:
+
+    def __init__(self, state):
+        self.state = state
+
+    def __call__(self, sim):
+        return sim.load.get_state().name == self.state
+
+    def __repr__(self):
+        return f"load.state == {self.state}"
+
+#the energy stored in the capacitor (i.e., 0.5 * C * V^2) dropped below the given budget (J)
+class EnergyBelow:
+
+    def __init__(self, energy):
+        self.energy = energy
+
+    def __call__(self, sim):
+        return 0.5 * sim.cap.capacitance * sim.cap.voltage**2 < self.energy
+
+    def __repr__(self):
+        return f"cap.energy < {self.energy}"
+
+#the capacitor voltage dropped below the given voltage
+class VoltageBelow:
+
+    def __init__(self, voltage):
+        self.voltage = voltage
+
+    def __call__(self, sim):
+        return sim.cap.voltage < self.voltage
+
+    def __repr__(self):
+        return f"cap.voltage < {self.voltage}"
+
+def checkpoint_successful(num = 1):
+    return StatReached('load', 'num_CHECKPOINT_successful', num)
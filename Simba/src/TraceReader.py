@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Helper class: Trace reader
+
+Reader of a (harvesting) trace, i.e., values at ascending sample times, for modules that look up the sample of the
+current time (e.g., `SolarPanel` and `TEG`). As the simulation time only increases, the reader keeps a cursor at the
+last sample it looked up and moves it forward from there, such that each lookup takes amortized constant time instead
+of searching the complete trace; it only searches the trace (binary search) if the time jumps further or backwards.
+
+Traces can further be compacted before (`compact()`): runs of consecutive samples with (about) the same value (e.g.,
+zeros at night, saturated values) are merged into a single sample, such that the module only wakes the simulation when
+the value actually changes.
+"""
+
+import copy
+import numpy as np
+
+#merge each run of consecutive samples whose values all differ at most by the tolerance from the mean of the run into a single
+#sample at the start of the run, whose value is the time-weighted mean of the run (each sample holds until the next one), i.e.,
+#the integral of the run (and thus about the harvested energy) does not change; identical samples (tolerance = 0) are merged
+#exactly. The last sample is always kept, such that the end of the trace does not change
+def compact(times, values, tolerance = 0):
+    if len(values) < 2:
+        return times, values
+    if tolerance == 0:
+        keep = np.empty(len(values), dtype = bool)
+        keep[0] = True
+        keep[1:] = values[1:] != values[:-1]
+        keep[-1] = True
+        return times[keep], values[keep]
+    
+    durations = np.diff(times).tolist()
+    starts, means = [], [] #first sample and mean value of each run
+    for idx, value in enumerate(values[:-1].tolist()):
+        if len(means) > 0:
+            mean = (total + value * durations[idx]) / (duration + durations[idx]) if duration + durations[idx] > 0 else means[-1]
+            low, high = min(low, value), max(high, value)
+        if len(means) == 0 or high - mean > tolerance or mean - low > tolerance: #a sample of the run would change by more than the tolerance
+            starts.append(idx)
+            means.append(value)
+            total, duration, low, high = 0, 0, value, value
+        total += value * durations[idx]
+        duration += durations[idx]
+        means[-1] = total / duration if duration > 0 else means[-1]
+    
+    return times[starts + [len(times) - 1]], np.array(means + [values[-1]], dtype = float)
+
+class TraceReader:
+
+    MAX_STEPS = 8 #samples the cursor is moved forward before the trace is searched instead
+
+    def __init__(self, times, values, time_end):
+        self.times = times
+        self.values = values
+        self.time_end = time_end #end of the trace (in case there is no next sample)
+        self.reset()
+
+    def reset(self):
+        self.index = 0
+
+    #copies (e.g., in snapshots of a simulation) share the trace, only the cursor is copied
+    def __deepcopy__(self, memo):
+        reader = copy.copy(self)
+        memo[id(self)] = reader
+        return reader
+
+    #index of the first sample at or after the given time (i.e., np.searchsorted(times, time, side = 'left'))
+    def seek(self, time):
+        times = self.times
+        index = self.index
+        if index > 0 and times[index - 1] >= time: #backwards
+            self.index = int(np.searchsorted(times, time, side = 'left'))
+            return self.index
+
+        for _ in range(self.MAX_STEPS):
+            if index >= len(times) or times[index] >= time:
+                self.index = index
+                return index
+            index += 1
+        self.index = int(np.searchsorted(times, time, side = 'left'))
+        return self.index
+
+    #value of the sample at or after the given time
+    def get_value(self, time):
+        return self.values[self.seek(time)]
+
+    #time of the sample after the one the cursor is at, i.e., when the value looked up last changes
+    def get_next_time(self):
+        if self.index < len(self.times) - 1:
+            return int(self.times[self.index + 1])
+        return int(self.time_end)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Helper: Trace store
+
+Process-local store of the harvesting traces loaded by the modules (e.g., the irradiance traces of a `SolarPanel`).
+Each trace file is only read once per process; the trace is kept as NumPy arrays (one per column).
+
+The traces of a process can be published to a directory (`publish()`), where each column is stored as `.npy` file.
+Processes attached to this directory (`attach()`, e.g., the workers of a `TradeoffExplorer`) memory-map these files
+instead of reading the trace file again, i.e., all processes share the same trace in memory and slices of it are views
+without any copies.
+
+Further, each trace file is compiled to a binary file next to it (`<FILE>.bin`) when it is read for the first time: a
+small JSON header (the trace's info, the columns' types and lengths, and the size and modification time of the trace
+file) followed by the contiguous columns. Later reads (in any process) memory-map this file instead of parsing the trace
+file, it is compiled again as soon as the trace file changes.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+traces = {} #key -> (info, {column : array})
+shared_directory = None
+
+COMPILE = True #compile trace files to binary files next to them
+COMPILED_MAGIC = b'SIMBATRC'
+COMPILED_VERSION = 1
+COMPILED_ALIGNMENT = 64 #bytes, start of the header and each column
+
+#key of a trace file, changes if the file is changed
+def get_key(file_path):
+    stat = os.stat(file_path)
+    return hashlib.sha1(f"{os.path.abspath(file_path)}:{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()
+
+#get the trace of the given file; read(file_path) is only called if the trace is neither loaded nor shared and
+#returns the trace's info (dict) and columns (dict of 1D arrays)
+def get_trace(file_path, read):
+    key = get_key(file_path)
+    if key not in traces:
+        if shared_directory != None and os.path.isfile(os.path.join(shared_directory, f"{key}.json")):
+            traces[key] = load_shared(key)
+        else:
+            traces[key] = load_compiled(file_path) if COMPILE else None
+            if traces[key] == None:
+                info, columns = read(file_path)
+                traces[key] = (info, {name : np.asarray(values) for name, values in columns.items()})
+                if COMPILE:
+                    compile_trace(file_path, *traces[key])
+    return traces[key]
+
+def get_compiled_path(file_path):
+    return f"{file_path}.bin"
+
+#identity of the trace file the compiled file was created from
+def get_source(file_path):
+    stat = os.stat(file_path)
+    return {'size' : stat.st_size, 'mtime_ns' : stat.st_mtime_ns}
+
+def get_aligned(offset):
+    return -(-offset // COMPILED_ALIGNMENT) * COMPILED_ALIGNMENT
+
+#store the trace in a binary file next to the trace file (if possible, e.g., the directory might be read-only)
+def compile_trace(file_path, info, columns):
+    if any(values.dtype.hasobject for values in columns.values()):
+        return #e.g., strings, cannot be memory-mapped
+    header = {'version' : COMPILED_VERSION, 'source' : get_source(file_path), 'info' : info,
+              'columns' : [{'name' : name, 'dtype' : values.dtype.str, 'length' : len(values)} for name, values in columns.items()]}
+    try:
+        header = json.dumps(header).encode()
+    except TypeError:
+        return #info cannot be stored
+    compiled_path = get_compiled_path(file_path)
+    try:
+        with open(f"{compiled_path}.{os.getpid()}.tmp", 'wb') as file: #other processes only use complete files
+            file.write(COMPILED_MAGIC + len(header).to_bytes(8, 'little') + header)
+            for values in columns.values():
+                file.write(b'\0' * (get_aligned(file.tell()) - file.tell()))
+                file.write(np.ascontiguousarray(values).tobytes())
+        os.replace(f"{compiled_path}.{os.getpid()}.tmp", compiled_path)
+    except OSError:
+        pass #the trace is read from the trace file next time
+
+#memory-map the compiled trace file, returns None if it does not exist or is outdated
+def load_compiled(file_path):
+    compiled_path = get_compiled_path(file_path)
+    try:
+        with open(compiled_path, 'rb') as file:
+            if file.read(len(COMPILED_MAGIC)) != COMPILED_MAGIC:
+                return None
+            length = int.from_bytes(file.read(8), 'little')
+            header = json.loads(file.read(length))
+    except (OSError, ValueError):
+        return None
+    if header['version'] != COMPILED_VERSION or header['source'] != get_source(file_path):
+        return None
+
+    columns = {}
+    offset = len(COMPILED_MAGIC) + 8 + length
+    for column in header['columns']:
+        dtype = np.dtype(column['dtype'])
+        offset = get_aligned(offset)
+        if column['length'] > 0:
+            columns[column['name']] = np.memmap(compiled_path, dtype = dtype, mode = 'r', offset = offset, shape = (column['length'],))
+        else:
+            columns[column['name']] = np.empty(0, dtype = dtype)
+        offset += dtype.itemsize * column['length']
+    return header['info'], columns
+
+def load_shared(key):
+    with open(os.path.join(shared_directory, f"{key}.json"), 'r') as file:
+        info = json.load(file)
+    columns = {name : np.load(os.path.join(shared_directory, f"{key}_{name}.npy"), mmap_mode = 'r') for name in info['columns']}
+    return info['info'], columns
+
+#use the traces published to the given directory (by another process)
+def attach(directory):
+    global shared_directory
+    shared_directory = directory
+
+#store all loaded traces in the given directory, such that attached processes can memory-map them
+def publish(directory):
+    for key, (info, columns) in traces.items():
+        if os.path.isfile(os.path.join(directory, f"{key}.json")):
+            continue
+        for name, values in columns.items():
+            np.save(os.path.join(directory, f"{key}_{name}.npy"), values)
+        with open(os.path.join(directory, f"{key}.json.tmp"), 'w') as file: #attached processes only use complete traces
+            json.dump({'info' : info, 'columns' : list(columns)}, file)
+        os.replace(os.path.join(directory, f"{key}.json.tmp"), os.path.join(directory, f"{key}.json"))
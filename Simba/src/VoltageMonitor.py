@@ -20,8 +20,23 @@ class VoltageMonitor:
         self.thresholds_rising = SortedDict()
         self.thresholds_falling = SortedDict()
         self.Events = Enum("Events", [])
+        self.version = 0 #incremented whenever the thresholds change
         self.register_events(self.default_thresholds)
         
+    #the events are created dynamically and cannot be pickled, store their names instead (e.g., for snapshots of the simulation)
+    def __getstate__(self):
+        state = {key : value for key, value in self.__dict__.items() if not hasattr(value, '__wrapped__')} #without methods wrapped by the profiler
+        state['Events'] = [event.name for event in self.Events]
+        state['thresholds_rising'] = [(v, event.name) for v, event in self.thresholds_rising.items()]
+        state['thresholds_falling'] = [(v, event.name) for v, event in self.thresholds_falling.items()]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.Events = Enum("Events", state['Events'])
+        self.thresholds_rising = SortedDict({v : self.Events[name] for v, name in state['thresholds_rising']})
+        self.thresholds_falling = SortedDict({v : self.Events[name] for v, name in state['thresholds_falling']})
+        
     def register_event(self, name, v_threshold, edge):
         
         try:
@@ -29,18 +44,24 @@ class VoltageMonitor:
         except:
             pass
         
+        self.version += 1
         if edge in ['rising', 'both']:
             self.thresholds_rising[v_threshold] = self.Events[name]
             
         if edge in ['falling', 'both']:
             self.thresholds_falling[v_threshold] = self.Events[name]
         
+    def is_registered(self, name):
+        return name in self.Events.__members__ and \
+            (self.Events[name] in self.thresholds_rising.values() or self.Events[name] in self.thresholds_falling.values())
+        
     def register_events(self, evt_list):
         for evt in evt_list:
             self.register_event(evt[0], evt[1], evt[2]) #0...name, 1...threshold, 2...edge
     
     @dispatch(str)
     def unregister_event(self, name):
+        self.version += 1
         if self.Events[name] in self.thresholds_falling.values():
             del self.thresholds_falling[self.thresholds_falling.keys()[self.thresholds_falling.values().index(self.Events[name])]]
 
@@ -49,6 +70,7 @@ class VoltageMonitor:
             
     @dispatch(float)       
     def unregister_event(self, voltage):
+        self.version += 1
         if voltage in self.thresholds_falling:
             del self.thresholds_falling[voltage]
         if voltage in self.thresholds_rising:
@@ -11,7 +11,7 @@ import numpy as np
 # Configuration(s) for simulation
 
 from Gameboy import harvest_config_solar, load_config, converter_config
-from Simba import run_tradeoff_exploration
+from Simba import TradeoffExplorer
 
 # No incoming harvesting energy
 harvest_config_none = {
@@ -50,27 +50,20 @@ min_caps = { #known from previous experiments; just skip anything below that
     4.87 : 200e-6}
 
 if __name__ == '__main__':
-    # For all V high threshold options, get the mininum feasible capacitance
-    for vhigh in [3.63, 3.97, 4.3, 4.61, 4.87]:
-        for cap in caps:
-            
-            if cap < min_caps[vhigh]:
-                continue
-            
-            base_config['capacitor']['settings']['capacitance'] = cap
+    # For all V high threshold options, get the mininum feasible capacitance (all searches share the same pool of workers)
+    with TradeoffExplorer() as explorer:
+        for vhigh in [3.63, 3.97, 4.3, 4.61, 4.87]:
             base_config['capacitor']['settings']['v_initial'] = vhigh
             
-            params = {'load.v_checkpoint' : list(np.arange(3.4, vhigh, 0.01))}
+            params = {'cap.capacitance' : [cap for cap in caps if cap >= min_caps[vhigh]],
+                      'load.v_checkpoint' : list(np.arange(3.4, vhigh, 0.01))}
             
-            result = run_tradeoff_exploration(params, metrics, base_config)
-            result = pd.DataFrame(result).sort_values('load.v_checkpoint')
-            v_threshold_min = result[result['load.num_CHECKPOINT_successful'] >= 1]
+            # A checkpoint is possible for all larger capacitances and thresholds, hence we only search the boundary instead of simulating all options
+            v_checkpoints, result = explorer.search(params, lambda result: result['load.num_CHECKPOINT_successful'] >= 1, metrics, base_config, 
+                                                    settings = {'fork_late_params' : True}) #v_checkpoint only matters once the capacitor falls to it
             
-            #This is the first time, we were able to save a checkpoint -> store minimum C and exit loop
-            if len(v_threshold_min) != 0:
-                v_threshold_min = round(v_threshold_min.iloc[0]['load.v_checkpoint'], 2)
-                thresholds[vhigh] = cap
-                print(f"Min C for {vhigh}:{cap}")
-                break
-                
-                
\ No newline at end of file
+            #The first capacitance, where we are able to save a checkpoint -> store minimum C
+            feasible = [cap for cap, v_threshold_min in v_checkpoints.items() if v_threshold_min != None]
+            if len(feasible) != 0:
+                thresholds[vhigh] = feasible[0]
+                print(f"Min C for {vhigh}:{feasible[0]}")
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the simulation core:
+Runs a fixed set of scenarios based on the Botoks and Gameboy configurations (see Simulations/) and reports
+wall time, simulation steps per second, peak memory usage (RSS) and a checksum of the results of each scenario
+to a JSON file. Comparing two reports (e.g., of different commits) shows speedups/regressions and whether
+the results changed.
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import hashlib
+import platform
+import resource
+import subprocess
+import argparse
+import multiprocessing as mp
+from queue import Empty
+
+sys.path[:0] = [os.path.join(os.path.dirname(os.path.abspath(__file__)), path) for path in ['../Simba/src', '../Simulations/Botoks', '../Simulations/Gameboy']]
+
+from Simba import Simulation, run_tradeoff_exploration, is_failed
+import Botoks
+import Gameboy
+
+def botoks(harvester):
+    return {'capacitor' : Botoks.capacitor_config, 'harvester' : harvester, 'converter' : Botoks.converter_config, 'load' : Botoks.load_config_burn}
+
+def gameboy_solar_day():
+    config = {'capacitor' : copy.deepcopy(Gameboy.capacitor_config), 'harvester' : copy.deepcopy(Gameboy.harvest_config_solar_long),
+              'converter' : copy.deepcopy(Gameboy.converter_config), 'load' : copy.deepcopy(Gameboy.load_config)}
+    #one day of the long-term simulation (see sim_gameboy_longterm_data.py), i.e., 15h starting at 5:00
+    config['harvester']['settings']['file'] = 'NREL/2023jun.json'
+    config['harvester']['settings']['t_start'] = 5 * 3600
+    config['converter']['settings']['vout_ok_high'] = 3.63
+    config['capacitor']['settings']['capacitance'] = 5100e-6
+    config['load']['settings']['v_checkpoint'] = 3.34
+    return config
+
+def gameboy_sweep():
+    #minimum capacitance without harvested energy (see get_gameboy_min_c.py) for 50 capacitances
+    config = {'capacitor' : {'type' : 'IdealCapacitor', 'settings' : {'capacitance' : 3300e-6, 'v_initial' : 4.87, 'v_rated' : 10}},
+              'harvester' : {'type' : 'Artificial', 'settings' : {'shape' : 'const', 'i_high' : 0, 'v_oc' : 3}},
+              'converter' : copy.deepcopy(Gameboy.converter_config), 'load' : copy.deepcopy(Gameboy.load_config)}
+    params = {'cap.capacitance' : [round(200e-6 + 20e-6 * i, 6) for i in range(50)]}
+    metrics = [{'module' : 'load', 'params' : ['num_CHECKPOINT_successful', 'num_RESTORE_successful', 'time_COMPUTE']}]
+    return config, params, metrics
+
+# Name -> (configuration, simulated time (s), timestep (s))
+scenarios = {'botoks_const'      : (lambda: botoks(Botoks.harvest_config), 10, 1e-3),
+             'botoks_iv'         : (lambda: botoks(Botoks.harvest_config_solar), 10, 1e-3),
+             'gameboy_const'     : (lambda: {'capacitor' : Gameboy.capacitor_config, 'harvester' : Gameboy.harvest_config_const,
+                                             'converter' : Gameboy.converter_config, 'load' : Gameboy.load_config}, 60, 1e-3),
+             'gameboy_solar_day' : (gameboy_solar_day, 15 * 3600, 5e-3),
+             'gameboy_sweep'     : (gameboy_sweep, 10, 1e-3)}
+
+#round floats, such that the checksum does not depend on the last digits of the results
+def clean(value):
+    if isinstance(value, dict):
+        return {str(k) : clean(v) for k, v in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [clean(v) for v in value]
+    try:
+        value = float(value)
+        return None if value != value else float(f"{value:.9g}")
+    except (TypeError, ValueError):
+        return str(value)
+
+def get_checksum(results):
+    return hashlib.sha256(json.dumps(results, sort_keys = True).encode()).hexdigest()[:16]
+
+def run_simulation(config, sim_time, timestep):
+    config = copy.deepcopy(config)
+    sim = Simulation(config['capacitor'], config['harvester'], config['converter'], config['load'])
+    sim.max_step_size = timestep
+    start = time.perf_counter()
+    sim.run(sim_time)
+    wall_time = time.perf_counter() - start
+
+    results = {'v_cap' : sim.cap.voltage, 'time' : sim.time}
+    for mod in ['load', 'harvester', 'cap']:
+        module = getattr(sim, mod)
+        results[mod] = module.get_log_stats(False) if mod != 'load' else module.get_log_stats()
+    return wall_time, sim.num_steps, clean(results)
+
+def run_sweep(config, params, metrics, sim_time, timestep):
+    config['sim_time'] = sim_time
+    start = time.perf_counter()
+    results = run_tradeoff_exploration(params, metrics, config, {'timestep' : timestep})
+    wall_time = time.perf_counter() - start
+    failed = [result for result in results if is_failed(result)] #(failed experiments are returned as error entries)
+    if len(failed) > 0:
+        error = failed[0]['error'].strip().splitlines()[-1] if isinstance(failed[0], dict) else repr(failed[0])
+        raise Exception(f"{len(failed)} of {len(results)} experiments failed, e.g., {error}")
+    results = sorted((clean(result) for result in results), key = lambda result: json.dumps(result, sort_keys = True))
+    return wall_time, None, results
+
+def run_scenario(name, scale, queue):
+    create, sim_time, timestep = scenarios[name]
+    sim_time = sim_time * scale
+    config = create()
+    try:
+        if isinstance(config, tuple):
+            wall_time, steps, results = run_sweep(*config, sim_time, timestep)
+        else:
+            wall_time, steps, results = run_simulation(config, sim_time, timestep)
+    except Exception as e:
+        queue.put({'error' : repr(e)})
+        raise
+
+    #peak memory of this process (and the processes of the sweep), ru_maxrss is given in kB (Linux)
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    queue.put({'sim_time' : sim_time,
+               'wall_time' : wall_time,
+               'steps' : steps,
+               'steps_per_second' : steps / wall_time if steps != None else None,
+               'peak_rss_mb' : rss / 1024,
+               'checksum' : get_checksum(results),
+               'results' : results})
+
+#wait for the result of a scenario process; a process that dies without result (e.g., killed when out of memory,
+#segmentation fault) is reported as failed instead of waiting forever
+def get_result(process, queue):
+    while True:
+        try:
+            return queue.get(timeout = 1)
+        except Empty:
+            if not process.is_alive():
+                try:
+                    return queue.get(timeout = 1) #result sent just before the process ended
+                except Empty:
+                    return {'error' : f"process ended without result (exit code {process.exitcode})"}
+
+def get_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd = os.path.dirname(os.path.abspath(__file__)), text = True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report, reference):
+    print(f"{'scenario':<20} {'wall time (s)':>14} {'reference (s)':>14} {'speedup':>8}  results")
+    for name, result in report['scenarios'].items():
+        if name not in reference['scenarios']:
+            continue
+        ref = reference['scenarios'][name]
+        same = 'same' if result['checksum'] == ref['checksum'] else 'CHANGED'
+        print(f"{name:<20} {result['wall_time']:>14.3f} {ref['wall_time']:>14.3f} {ref['wall_time'] / result['wall_time']:>7.2f}x  {same}")
+
+#%%
+parser = argparse.ArgumentParser(
+                    prog='SimbaBenchmark',
+                    description='Runs fixed Botoks and Gameboy scenarios and reports wall time, steps/s, peak RSS and result checksums.')
+
+parser.add_argument("-o", "--output", help='JSON file the report is written to (Default = benchmark_<COMMIT>.json).', required=False)
+parser.add_argument("-s", "--scenarios", nargs='+', choices=list(scenarios), help='Scenarios to run (Default = all).', required=False, default=list(scenarios))
+parser.add_argument("--scale", type=float, help='Scale the simulated time of all scenarios, e.g., 0.1 for a quick check (Default = 1).', required=False, default=1)
+parser.add_argument("-c", "--compare", help='Compare the results with a previous report.', required=False)
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+
+    report = {'commit' : get_commit(),
+              'date' : time.strftime('%Y-%m-%d %H:%M:%S'),
+              'python' : platform.python_version(),
+              'platform' : platform.platform(),
+              'cpus' : mp.cpu_count(),
+              'scale' : args.scale,
+              'scenarios' : {},
+              'failed' : {}}
+
+    for name in args.scenarios:
+        #each scenario runs in a separate process, such that its peak memory usage can be measured independently
+        queue = mp.Queue()
+        process = mp.Process(target = run_scenario, args = (name, args.scale, queue))
+        process.start()
+        result = get_result(process, queue)
+        process.join()
+        if 'error' in result:
+            print(f"{name}: failed ({result['error']}).")
+            report['failed'][name] = result['error']
+            continue
+        report['scenarios'][name] = result
+        steps = f", {result['steps_per_second']:.0f} steps/s" if result['steps'] != None else ""
+        print(f"{name}: {result['wall_time']:.3f} s{steps}, {result['peak_rss_mb']:.1f} MB, checksum {result['checksum']}")
+
+    output = args.output if args.output != None else f"benchmark_{report['commit']}.json"
+    with open(output, 'w') as file:
+        json.dump(report, file, indent = 1)
+    print(f"Stored report in {output}.")
+
+    if args.compare != None:
+        with open(args.compare, 'r') as file:
+            compare(report, json.load(file))
+
+    #failed scenarios are not part of the report, i.e., it must not be used as a reference
+    if len(report['failed']) > 0:
+        print(f"{len(report['failed'])} scenarios failed: {', '.join(report['failed'])}.")
+        sys.exit(1)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Check of the job queue:
+Starts several local workers (`JobQueue.py`) on a temporary queue, runs a small exploration (Gameboy with a constant
+harvesting current, 12 capacitances) through the queue and compares its results with the ones of local processes.
+It further submits jobs whose outputs cannot be pickled, which have to fail (with their traceback) without stopping the
+workers. Exits with 1 if any check fails.
+"""
+
+import os
+import sys
+import copy
+import shutil
+import tempfile
+import argparse
+import threading
+import subprocess
+
+sys.path[:0] = [os.path.join(os.path.dirname(os.path.abspath(__file__)), path) for path in ['../Simba/src', '../Simulations/Gameboy']]
+
+from Simba import TradeoffExplorer
+from JobQueue import JobQueue, QueuePool, JobError
+import Gameboy
+
+def get_scenario():
+    harvester = copy.deepcopy(Gameboy.harvest_config_const)
+    harvester['settings']['i_high'] = 2.5e-3
+    config = {'capacitor' : {'type' : 'IdealCapacitor', 'settings' : {'capacitance' : 3300e-6, 'v_rated' : 10, 'v_initial' : 3.0, 'log' : False}},
+              'harvester' : harvester,
+              'converter' : {'type' : 'Hysteresis', 'settings' : {'v_ov' : 4.5, 'v_high' : 3.97, 'v_low' : 3.32}},
+              'load' : copy.deepcopy(Gameboy.load_config),
+              'sim_time' : 4}
+    params = {'cap.capacitance' : [round(200e-6 + 40e-6 * i, 6) for i in range(12)]}
+    metrics = [{'module' : 'load', 'params' : ['forward_progress', 'num_CHECKPOINT_successful']}]
+    return config, params, metrics
+
+def get_entries(results):
+    return sorted(repr(sorted(result.items())) for result in results)
+
+#%%
+parser = argparse.ArgumentParser(
+                    prog='SimbaCheckJobQueue',
+                    description='Runs a small exploration with several local workers of a job queue and compares it with local processes.')
+
+parser.add_argument("-w", "--workers", type=int, help='Number of workers (Default = 3).', required=False, default=3)
+parser.add_argument("-p", "--processes", type=int, help='Number of processes per worker (Default = 2).', required=False, default=2)
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    config, params, metrics = get_scenario()
+    settings = {'progress' : False, 'cost_history' : None}
+    directory = tempfile.mkdtemp(prefix = 'simba_queue_')
+    queue = os.path.join(directory, 'queue.db')
+    JobQueue(queue).close()
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../Simba/src/JobQueue.py')
+    workers = [subprocess.Popen([sys.executable, script, queue, '-p', str(args.processes), '--idle-timeout', '10'], cwd = directory) for _ in range(args.workers)]
+    errors = []
+    try:
+        with TradeoffExplorer(args.processes, cost_history = None) as explorer:
+            expected = explorer.run(params, metrics, config, settings)
+        with TradeoffExplorer(args.workers * args.processes, queue, cost_history = None) as explorer:
+            results = explorer.run(params, metrics, config, settings)
+        if get_entries(results) != get_entries(expected):
+            errors.append("Results of the job queue differ from the ones of local processes.")
+
+        #jobs whose outputs cannot be pickled (a lock) fail, the workers still run the following jobs
+        pool = QueuePool(queue)
+        failing = [pool.apply_async(threading.Lock) for _ in range(args.workers * args.processes)]
+        following = pool.apply_async(len, args = ([1, 2, 3],))
+        following.wait(120)
+        for result in failing:
+            result.wait(10)
+        if not all(result.ready() and isinstance(result.value, JobError) and 'pickle' in str(result.value) for result in failing):
+            errors.append("Jobs whose outputs cannot be pickled did not fail with their traceback.")
+        if not following.successful() or following.value != 3:
+            errors.append("Workers did not run the jobs after the failed ones.")
+        pool.close()
+    finally:
+        for worker in workers:
+            worker.wait()
+        shutil.rmtree(directory, ignore_errors = True)
+
+    if any(worker.returncode != 0 for worker in workers):
+        errors.append("Workers did not stop normally.")
+    for error in errors:
+        print(f"Error: {error}")
+    if len(errors) > 0:
+        sys.exit(1)
+    print(f"Job queue with {args.workers} workers is fine.")
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Regression check of the Pareto exploration:
+Simulates the full grid of a fixed scenario (Gameboy load with a hysteresis converter and a constant harvesting current of
+2.5 mA for 8 s, 10 capacitances x 18 checkpoint thresholds), compares the Pareto front of the grid with the one found by
+`explore_pareto` and reports the options that differ. Exits with 1 if the fronts differ for any of the given objectives.
+"""
+
+import os
+import sys
+import copy
+import argparse
+import multiprocessing as mp
+
+sys.path[:0] = [os.path.join(os.path.dirname(os.path.abspath(__file__)), path) for path in ['../Simba/src', '../Simulations/Gameboy']]
+
+from Simba import TradeoffExplorer, get_pareto_front
+import Gameboy
+
+def get_scenario():
+    harvester = copy.deepcopy(Gameboy.harvest_config_const)
+    harvester['settings']['i_high'] = 2.5e-3
+    config = {'capacitor' : {'type' : 'IdealCapacitor', 'settings' : {'capacitance' : 3300e-6, 'v_rated' : 10, 'v_initial' : 3.0, 'log' : False}},
+              'harvester' : harvester,
+              'converter' : {'type' : 'Hysteresis', 'settings' : {'v_ov' : 4.5, 'v_high' : 3.97, 'v_low' : 3.32}},
+              'load' : copy.deepcopy(Gameboy.load_config),
+              'sim_time' : 8}
+    params = {'cap.capacitance' : [round(200e-6 + 40e-6 * i, 6) for i in range(10)],
+              'load.v_checkpoint' : [round(3.35 + 0.025 * i, 3) for i in range(18)]}
+    return config, params
+
+def get_options(front, keys):
+    return sorted(tuple(result[key] for key in keys) for result in front)
+
+#%%
+parser = argparse.ArgumentParser(
+                    prog='SimbaCheckPareto',
+                    description='Compares the Pareto front found by explore_pareto with the one of the full grid of a fixed scenario.')
+
+parser.add_argument("-o", "--objectives", nargs='+', help='Objectives as <METRIC>:<min|max> (Default = load.forward_progress:max load.time_unavailable_95:min).',
+                    required=False, default=['load.forward_progress:max', 'load.time_unavailable_95:min'])
+parser.add_argument("-p", "--processes", type=int, help='Number of processes (Default = number of CPUs).', required=False, default=mp.cpu_count())
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    objectives = dict(objective.split(':') for objective in args.objectives)
+    config, params = get_scenario()
+    settings = {'normalize_stats' : True, 'progress' : False}
+    metrics = [{'module' : module, 'params' : [key.split('.')[1] for key in objectives if key.split('.')[0] == module]} for module in sorted({key.split('.')[0] for key in objectives})]
+
+    with TradeoffExplorer(args.processes) as explorer:
+        grid = explorer.run(params, metrics, config, settings)
+        front, results = explorer.explore_pareto(params, objectives, [], config, settings)
+
+    expected = get_options(get_pareto_front(grid, objectives), params.keys())
+    found = get_options(front, params.keys())
+    print(f"Grid: {len(grid)} options, front of {len(expected)} options.")
+    print(f"Exploration: {len(results)} options, front of {len(found)} options.")
+    missing = sorted(set(expected) - set(found))
+    dominated = sorted(set(found) - set(expected))
+    for option in missing:
+        print(f"Missing: {dict(zip(params.keys(), option))}")
+    for option in dominated:
+        print(f"Dominated: {dict(zip(params.keys(), option))}")
+    if len(missing) > 0 or len(dominated) > 0:
+        sys.exit(1)
+    print("Fronts are equal.")